@@ -0,0 +1,192 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+# Lokale directory waar de gepubliceerde (read-only) datasets staan
+STORE_DIR = os.path.join("data", "store")
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+# Lichte filter-index (jaren, leveranciers) naast de versies; blijft staan bij verversen en wordt vóór het koppelen gelezen
+FILTER_INDEX_FILE = "filter_index.json"
+
+
+class DatasetStore:
+    def __init__(self, root: str = STORE_DIR, keep_versions: int = 2, log_enabled: bool = False):
+        """
+        Publish DataFrames once as immutable, column-per-file memory-mapped datasets,
+        so every Streamlit session and server process can attach without copying.
+
+        Parameters:
+        - root: Directory holding the published versions.
+        - keep_versions: Number of recent versions kept on disk after each publish (older ones are pruned).
+        - log_enabled: If True, log messages will be printed to stdout.
+        """
+        self.root = root
+        self.keep_versions = keep_versions
+        self.log_enabled = log_enabled
+        os.makedirs(self.root, exist_ok=True)
+
+    def _log(self, message: str):
+        if self.log_enabled:
+            print(message)
+
+    def current_version(self):
+        """
+        Return the name of the currently published version, or None if nothing is published yet.
+        """
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, tables: dict, metadata: dict = None) -> str:
+        """
+        Write the tables as a new version and atomically make it the current one.
+
+        Parameters:
+        - tables: Dictionary mapping table name to DataFrame.
+        - metadata: Optional JSON-serialisable extra information stored in the manifest.
+
+        Returns:
+        - The new version name.
+        """
+        version = f"v{time.time_ns()}"
+        tmp_dir = os.path.join(self.root, f".{version}.tmp")
+        os.makedirs(tmp_dir)
+
+        manifest = {"version": version, "tables": {}, "metadata": metadata or {}}
+        for table_name, df in tables.items():
+            table_dir = os.path.join(tmp_dir, table_name)
+            os.makedirs(table_dir)
+            manifest["tables"][table_name] = {
+                "rows": len(df),
+                "columns": [self._write_column(table_dir, i, col, df[col]) for i, col in enumerate(df.columns)],
+            }
+
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        # Eerst de volledige versie op zijn plek zetten, daarna pas de CURRENT-pointer omzetten (os.replace is atomair)
+        os.replace(tmp_dir, os.path.join(self.root, version))
+        pointer_tmp = os.path.join(self.root, f"{CURRENT_FILE}.tmp")
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer_tmp, os.path.join(self.root, CURRENT_FILE))
+        self._log(f"Published dataset version {version}")
+        self.prune(self.keep_versions)
+        return version
+
+    def _write_column(self, table_dir: str, position: int, name, series: pd.Series) -> dict:
+        filename = f"{position}.npy"
+        path = os.path.join(table_dir, filename)
+        dtype = series.dtype
+
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            # Tijdzone-bewuste kolommen worden als naïeve UTC opgeslagen
+            np.save(path, series.dt.tz_convert("UTC").dt.tz_localize(None).to_numpy())
+            return {"name": name, "file": filename, "kind": "array", "tz": str(dtype.tz)}
+        if isinstance(dtype, np.dtype) and dtype.kind in "biufmM":
+            np.save(path, series.to_numpy())
+            return {"name": name, "file": filename, "kind": "array"}
+
+        # Tekst, gemengde en nullable kolommen: dictionary-encoded (codes in het bestand, categorieën in het manifest)
+        if isinstance(dtype, pd.CategoricalDtype):
+            categorical = series.array
+        else:
+            try:
+                # Gesorteerde categorieën, zodat groupby/pivot dezelfde volgorde geven als op tekstkolommen
+                codes, uniques = pd.factorize(series, sort=True)
+            except TypeError:
+                codes, uniques = pd.factorize(series)
+            categorical = pd.Categorical.from_codes(codes, categories=pd.Index(uniques))
+        np.save(path, categorical.codes)
+        column = {"name": name, "file": filename, "kind": "categorical"}
+        categories = categorical.categories
+        if pd.api.types.infer_dtype(categories, skipna=False) in ("string", "empty"):
+            # Tekstcategorieën in een eigen bestand (UTF-8, vaste breedte) in plaats van in het manifest,
+            # zodat het manifest klein blijft, ook bij kolommen met veel unieke waarden
+            categories_file = f"{position}.categories.npy"
+            encoded = np.array([value.encode("utf-8") for value in categories], dtype=bytes)
+            np.save(os.path.join(table_dir, categories_file), encoded if len(encoded) else np.array([], dtype="S1"))
+            column["categories_file"] = categories_file
+        else:
+            column["categories"] = [value if isinstance(value, (str, int, float, bool)) else str(value)
+                                    for value in categories.tolist()]
+        return column
+
+    def filter_index(self):
+        """
+        Return the stored filter index, or None if none has been written yet.
+        """
+        try:
+            with open(os.path.join(self.root, FILTER_INDEX_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write_filter_index(self, filter_index: dict):
+        """
+        Atomically replace the stored filter index.
+        """
+        tmp_path = os.path.join(self.root, f"{FILTER_INDEX_FILE}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(filter_index, f, ensure_ascii=False)
+        os.replace(tmp_path, os.path.join(self.root, FILTER_INDEX_FILE))
+
+    def manifest(self, version: str = None) -> dict:
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"No dataset published in {self.root}")
+        with open(os.path.join(self.root, version, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def attach(self, version: str = None) -> dict:
+        """
+        Attach to a published version zero-copy: every column is a read-only memory map.
+
+        Parameters:
+        - version: Version to attach to (default: the current one).
+
+        Returns:
+        - Dictionary mapping table name to a read-only DataFrame.
+        """
+        manifest = self.manifest(version)
+        version_dir = os.path.join(self.root, manifest["version"])
+        tables = {}
+        for table_name, table in manifest["tables"].items():
+            columns = {}
+            for column in table["columns"]:
+                values = np.load(os.path.join(version_dir, table_name, column["file"]), mmap_mode="r")
+                if column["kind"] == "categorical":
+                    if "categories_file" in column:
+                        encoded = np.load(os.path.join(version_dir, table_name, column["categories_file"]), mmap_mode="r")
+                        categories = pd.Index(np.char.decode(encoded, "utf-8"), dtype=str)
+                    else:
+                        categories = column["categories"]
+                    # validate=False: de codes worden niet gekopieerd
+                    values = pd.Categorical.from_codes(values, categories=categories, validate=False)
+                elif "tz" in column:
+                    # Naïeve UTC terug naar tijdzone-bewust: de int64-weergave als UTC lezen kopieert niet (tz_localize wel)
+                    utc = pd.DatetimeTZDtype(np.datetime_data(values.dtype)[0], "UTC")
+                    values = pd.array(values.view("i8"), dtype=utc, copy=False).tz_convert(column["tz"])
+                columns[column["name"]] = pd.Series(values, copy=False)
+            tables[table_name] = pd.DataFrame(columns, copy=False)
+        self._log(f"Attached dataset version {manifest['version']}")
+        return tables
+
+    def prune(self, keep: int = 2):
+        """
+        Remove old versions, keeping the current one and the `keep` most recent.
+        """
+        current = self.current_version()
+        versions = sorted(d for d in os.listdir(self.root) if d.startswith("v"))
+        for version in versions[:-keep] if keep else versions:
+            if version == current:
+                continue
+            # Op Windows kan een versie nog gemapt zijn door een andere sessie; die slaan we over
+            shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
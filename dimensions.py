@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+# Mogelijke kolomnamen in de stamgegevens; de eerste die bestaat wordt gebruikt
+NAME_COLUMNS = ['Naam', 'Leveranciersnaam', 'Relatienaam']
+SUPPLIER_CODE_COLUMNS = ['Leverancierscode', 'LeverancierCode', 'Leveranciersnummer']
+RELATION_CODE_COLUMNS = ['Relatiecode', 'RelatieCode', 'Relatienummer']
+FEEDBACK_SUPPLIER_COLUMNS = ['Leverancier', 'Leveranciersnaam', 'Naam', 'Leverancierscode', 'Relatiecode']
+FEEDBACK_SCORE_COLUMNS = ['Score', 'Cijfer', 'Beoordeling', 'Rating']
+
+# Beschrijvende kenmerken uit Relaties die (als ze bestaan) in de dimensie komen
+RELATION_ATTRIBUTES = ['Plaats', 'Land']
+
+
+def first_column(df, candidates: list):
+    """
+    Return the first of the candidate column names that exists in df, or None.
+    """
+    if df is None:
+        return None
+    return next((col for col in candidates if col in df.columns), None)
+
+
+def lookup(index: pd.Index, values) -> np.ndarray:
+    """
+    Positions of values in a unique index (-1 if missing). Only the distinct values are hashed,
+    so joining millions of rows costs one factorize plus a lookup per distinct value.
+    """
+    values = pd.Series(values, copy=False)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values)
+    positions = index.get_indexer(pd.Index(uniques, dtype=object).astype(str))
+    return np.where(codes >= 0, positions[codes], -1).astype(np.int32)
+
+
+class SupplierDimension:
+    def __init__(self, table: pd.DataFrame):
+        """
+        Supplier dimension: one row per supplier, where the row position is the integer SupplierKey.
+        Natural keys (name, supplier code, relation code) are resolved through hash indexes.
+
+        Parameters:
+        - table: Dimension table as built by build() (or attached from the dataset store).
+        """
+        self.table = table
+        self.index = pd.Index(table['Naam'].astype(str), dtype=object)
+        # Codes hoeven niet uniek te zijn (meerdere namen per relatie); de eerste leverancier per code telt
+        self.code_indexes = {}
+        for col in ('Leverancierscode', 'Relatiecode'):
+            if col in table.columns:
+                valid = table[col].notna().to_numpy()
+                codes = pd.Index(table[col][valid].astype(str), dtype=object)
+                first = ~codes.duplicated()
+                self.code_indexes[col] = (codes[first], table['SupplierKey'].to_numpy()[valid][first])
+
+    def __len__(self):
+        return len(self.table)
+
+    @classmethod
+    def build(cls, names: pd.Series, relaties: pd.DataFrame = None, leveranciers: pd.DataFrame = None,
+              feedback: pd.DataFrame = None):
+        """
+        Build the dimension from the supplier names on the order lines and the master data.
+
+        Parameters:
+        - names: Supplier names as they appear on the order lines (Naam).
+        - relaties: Optional Relaties dataset (relation code, place, ...).
+        - leveranciers: Optional Leveranciers dataset (supplier code, name, relation code).
+        - feedback: Optional FeedbackLeveranciers dataset; aggregated to FeedbackCount and FeedbackScore.
+
+        Returns:
+        - SupplierDimension with suppliers sorted by name, so SupplierKey order is name order.
+        """
+        members = set(pd.Series(names).dropna().astype(str).unique())
+
+        attributes = None
+        name_col = first_column(leveranciers, NAME_COLUMNS)
+        if name_col is not None:
+            columns = {name_col: 'Naam'}
+            supplier_code = first_column(leveranciers, SUPPLIER_CODE_COLUMNS)
+            relation_code = first_column(leveranciers, RELATION_CODE_COLUMNS)
+            if supplier_code is not None:
+                columns[supplier_code] = 'Leverancierscode'
+            if relation_code is not None:
+                columns[relation_code] = 'Relatiecode'
+            attributes = leveranciers[list(columns)].rename(columns=columns).dropna(subset=['Naam'])
+            attributes['Naam'] = attributes['Naam'].astype(str)
+            attributes = attributes.drop_duplicates(subset='Naam')
+            members.update(attributes['Naam'])
+
+        table = pd.DataFrame({'Naam': sorted(members)})
+        table.insert(0, 'SupplierKey', np.arange(len(table), dtype=np.int32))
+        if attributes is not None:
+            table = table.merge(attributes, on='Naam', how='left')
+
+        table = cls._join_relaties(table, relaties)
+        dimension = cls(table)
+        dimension._add_feedback(feedback)
+        return dimension
+
+    @staticmethod
+    def _join_relaties(table: pd.DataFrame, relaties: pd.DataFrame) -> pd.DataFrame:
+        relation_code = first_column(relaties, RELATION_CODE_COLUMNS)
+        name_col = first_column(relaties, NAME_COLUMNS)
+        extra = [col for col in RELATION_ATTRIBUTES if relaties is not None and col in relaties.columns]
+        if not extra or (relation_code is None and name_col is None):
+            return table
+
+        # Via de relatiecode als de leveranciers die hebben, anders via de naam
+        if relation_code is not None and 'Relatiecode' in table.columns:
+            key, right_key = 'Relatiecode', relation_code
+        elif name_col is not None:
+            key, right_key = 'Naam', name_col
+        else:
+            return table
+        right = relaties[[right_key] + extra].dropna(subset=[right_key]).drop_duplicates(subset=right_key)
+        positions = lookup(pd.Index(right[right_key].astype(str), dtype=object), table[key].astype(object))
+        for col in extra:
+            values = right[col].to_numpy(dtype=object)
+            table[col] = np.where(positions >= 0, values[positions], None)
+        return table
+
+    def _add_feedback(self, feedback: pd.DataFrame):
+        counts = np.zeros(len(self), dtype=np.int64)
+        scores = np.full(len(self), np.nan)
+        supplier_col = first_column(feedback, FEEDBACK_SUPPLIER_COLUMNS)
+        if supplier_col is not None and len(self):
+            keys = self.resolve(feedback[supplier_col])
+            score_col = first_column(feedback, FEEDBACK_SCORE_COLUMNS)
+            score = (pd.to_numeric(feedback[score_col], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+                     if score_col is not None else np.full(len(feedback), np.nan))
+            known = keys >= 0
+            counts = np.bincount(keys[known], minlength=len(self))
+            scored = known & ~np.isnan(score)
+            score_sum = np.bincount(keys[scored], weights=score[scored], minlength=len(self))
+            score_count = np.bincount(keys[scored], minlength=len(self))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                scores = np.where(score_count > 0, score_sum / score_count, np.nan)
+        self.table['FeedbackCount'] = counts
+        self.table['FeedbackScore'] = scores
+
+    def keys(self, names) -> np.ndarray:
+        """
+        SupplierKey per supplier name (-1 for missing or unknown names).
+        """
+        return lookup(self.index, names)
+
+    def resolve(self, values) -> np.ndarray:
+        """
+        SupplierKey per value of an unknown natural key (name, supplier code or relation code);
+        the index that matches the most values is used.
+        """
+        best = self.keys(values)
+        for index, supplier_keys in self.code_indexes.values():
+            positions = lookup(index, values)
+            keys = np.where(positions >= 0, supplier_keys[positions], -1).astype(np.int32)
+            if (keys >= 0).sum() > (best >= 0).sum():
+                best = keys
+        return best
+
+    def names(self, keys) -> np.ndarray:
+        """
+        Supplier names for display, per SupplierKey (keys must be valid, i.e. >= 0).
+        """
+        return self.index.to_numpy()[np.asarray(keys, dtype=np.intp)]
+
+    def attribute(self, column: str, keys) -> np.ndarray:
+        """
+        Value of a dimension column (e.g. FeedbackScore) per SupplierKey.
+        """
+        return self.table[column].to_numpy()[np.asarray(keys, dtype=np.intp)]
@@ -1,11 +1,20 @@
 import pandas as pd
 import numpy as np
 
+from fingerprint import RowFingerprinter
+from parallel_eda import ParallelEDAExecutor
+from sampling import ApproximateEDA
+
 class EDAService:
-    def __init__(self, df: pd.DataFrame, name: str = "DataFrame", preview_rows: int = 5):
+    def __init__(self, df: pd.DataFrame, name: str = "DataFrame", preview_rows: int = 5,
+                 sample_size: int = None, stratify_by=None, confidence: float = 0.95):
         self.df = df
         self.name = name
         self.preview_rows = preview_rows
+        # Met sample_size draaien de samenvattingen (stap 6, 8 en 9) op een steekproef met betrouwbaarheidsintervallen
+        self.approx = ApproximateEDA(df, sample_size, stratify_by, confidence) if sample_size else None
+        # Eigen executor (lazy aangemaakt) zodat de kolomcache tussen aanroepen van stap 10 bewaard blijft
+        self._executor = None
 
     def run_step(self, step: int):
         # Logical order of steps for effective EDA
@@ -27,6 +36,8 @@ class EDAService:
             self.categorical_summary(top_n=5)
         elif step == 9:
             self.correlation_matrix()
+        elif step == 10:
+            self.column_profiles()
         else:
             print(f"Invalid step: {step}")
 
@@ -110,26 +121,53 @@ class EDAService:
         else:
             print(nulls.round(2))
 
-    def duplicate_rows(self, show_samples: bool = True):
-        # Purpose: Detect and optionally inspect duplicate rows (based on hashable columns)
+    def duplicate_rows(self, show_samples: bool = True, subset: list = None):
+        # Purpose: Detect and optionally inspect duplicate rows (row fingerprints over all columns, nested ones included)
         print(f"\n=== {self.name} — Duplicate Rows ===")
-        hashable_cols = [col for col in self.df.columns if self.df[col].map(type).isin([int, float, str, bool, type(None)]).all()]
-        if not hashable_cols:
-            print("No hashable columns to detect duplicates.")
+        if self.df.shape[1] == 0:
+            print("No columns to detect duplicates.")
             return
 
         try:
-            dupe_mask = self.df[hashable_cols].duplicated()
+            fingerprinter = RowFingerprinter()
+            dupe_mask = fingerprinter.duplicated(self.df, subset=subset)
             dupe_count = dupe_mask.sum()
-            print(f"Duplicate count (based on {len(hashable_cols)} hashable columns): {dupe_count}")
+            columns_used = len(subset) if subset is not None else self.df.shape[1]
+            nested = fingerprinter.nested_columns
+            print(f"Duplicate count (based on {columns_used} columns, {len(nested)} nested): {dupe_count}")
             if dupe_count > 0 and show_samples:
                 print(self.df[dupe_mask].head())
         except Exception as e:
             print(f"Error during duplicate detection: {e}")
 
+    def duplicate_groups(self, subset: list = None):
+        # Purpose: List groups of identical rows
+        print(f"\n=== {self.name} — Duplicate Groups ===")
+        groups = RowFingerprinter().duplicate_groups(self.df, subset=subset)
+        if groups.empty:
+            print("No duplicate groups.")
+        else:
+            print(f"Groups: {groups['group'].nunique()}, rows involved: {len(groups)}")
+            print(groups.head(self.preview_rows * 4))
+        return groups
+
+    def near_duplicates(self, key_columns: list):
+        # Purpose: Find records that share a key but differ in other columns
+        print(f"\n=== {self.name} — Near Duplicates on {', '.join(key_columns)} ===")
+        result = RowFingerprinter().near_duplicates(self.df, key_columns)
+        if result.empty:
+            print("No near duplicates.")
+        else:
+            print(f"Keys with diverging rows: {result['group'].nunique()}, rows involved: {len(result)}")
+            print(self.df.loc[result.index].head(self.preview_rows))
+        return result
+
     def numeric_summary(self):
         # Purpose: Get descriptive statistics of numeric columns
         print(f"\n=== {self.name} — Numeric Summary ===")
+        if self.approx is not None:
+            self._print_approximate(self.approx.numeric_summary())
+            return
         numeric_df = self.df.select_dtypes(include=[np.number])
         if numeric_df.empty:
             print("No numeric columns available.")
@@ -146,6 +184,9 @@ class EDAService:
     def categorical_summary(self, top_n: int = 5):
         # Purpose: Identify frequent values in categorical columns
         print(f"\n=== {self.name} — Categorical Summary ===")
+        if self.approx is not None:
+            self._print_approximate(self.approx.categorical_summary(top_n))
+            return
         cat_cols = self.df.select_dtypes(include=["object", "category"]).columns
         if not len(cat_cols):
             print("No categorical columns found.")
@@ -157,8 +198,53 @@ class EDAService:
     def correlation_matrix(self):
         # Purpose: Explore relationships between numeric variables
         print(f"\n=== {self.name} — Correlation Matrix ===")
+        if self.approx is not None:
+            self._print_approximate(self.approx.correlation_matrix())
+            return
         num_df = self.df.select_dtypes(include=[np.number])
         if num_df.empty:
             print("No numeric columns present.")
         else:
-            print(num_df.corr(numeric_only=True))
\ No newline at end of file
+            print(num_df.corr(numeric_only=True))
+
+    def _print_approximate(self, result):
+        print(f"(approximate: sample of {self.approx.sample_size} of {self.approx.population_size} rows, "
+              f"{self.approx.confidence:.0%} confidence intervals)")
+        if isinstance(result, dict):
+            for col, counts in result.items():
+                print(f"\nColumn: {col}")
+                print(counts)
+        else:
+            print(result)
+
+    def progressive_summary(self, statistic: str = "numeric_summary", initial: int = 1_000, growth: int = 4):
+        # Purpose: Quick first estimate that tightens as more rows are scanned
+        print(f"\n=== {self.name} — Progressive {statistic} ===")
+        approx = self.approx or ApproximateEDA(self.df)
+        for scanned, result in approx.progressive(statistic, initial=initial, growth=growth):
+            print(f"\n--- {scanned} of {approx.population_size} rows scanned ---")
+            print(result)
+
+    def column_profiles(self, executor: ParallelEDAExecutor = None):
+        # Purpose: Per-column profile computed in parallel; unchanged columns come from the cache
+        print(f"\n=== {self.name} — Column Profiles ===")
+        if executor is None:
+            if self._executor is None:
+                self._executor = ParallelEDAExecutor(top_n=5)
+            # close() stopt alleen de workers; de cache blijft op self._executor staan
+            with self._executor:
+                profiles = self._executor.profile(self.df)
+            executor = self._executor
+        else:
+            profiles = executor.profile(self.df)
+
+        print(f"Recomputed columns: {len(executor.last_recomputed)} of {len(profiles)}")
+        for col, profile in profiles.items():
+            print(f"\nColumn: {col} ({profile['dtype']})")
+            print(f"missing={profile['missing']} ({profile['null_percentage']}%), unique={profile['unique']}")
+            if "min" in profile:
+                print(f"min={profile['min']}, max={profile['max']}")
+            if "top_values" in profile:
+                for value, count in profile["top_values"].items():
+                    print(f"- {value!r}: {count}")
+        return profiles
@@ -0,0 +1,250 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# Vaste sleutels (16 bytes) zodat fingerprints stabiel zijn tussen runs en processen
+HASH_KEYS = ("0123456789123456", "fedcba9876543210")
+# hash_key geldt alleen voor tekst; getallen en datums krijgen per woord een eigen zout op de invoer,
+# en elk woord combineert de kolommen met een eigen startwaarde en vermenigvuldiger
+NUMERIC_SALTS = (0, 0x9E3779B97F4A7C15)
+COMBINE_CONSTANTS = ((0x345678, 1000003), (0x2545F4914F6CDD1D, 69069))
+
+
+def canonical(value) -> str:
+    """
+    Serialise a (possibly nested) value to a stable string, so dicts with the same
+    content but a different key order produce the same representation.
+    """
+    return json.dumps(value, sort_keys=True, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+def hashable_series(series: pd.Series) -> pd.Series:
+    """
+    Return the series unchanged when its values are hashable, otherwise a canonical
+    string version of it (for columns with nested dicts/lists from the raw JSON).
+    """
+    if series.dtype != object:
+        return series
+    try:
+        pd.util.hash_pandas_object(series, index=False)
+        return series
+    except TypeError:
+        return series.map(canonical, na_action="ignore")
+
+
+# infer_dtype-uitkomsten van object-kolommen die als getal gehasht worden
+NUMERIC_INFERRED = ("integer", "floating", "mixed-integer-float", "boolean", "decimal")
+# ... en van object-kolommen met gemengde typen, die met een typelabel gehasht worden
+MIXED_INFERRED = ("mixed", "mixed-integer")
+
+
+def _numbers_as_float(value):
+    # Recursief int/bool naar float, zodat {'a': 1} en {'a': 1.0} dezelfde canonieke vorm krijgen
+    if isinstance(value, dict):
+        return {key: _numbers_as_float(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_numbers_as_float(item) for item in value]
+    if isinstance(value, (bool, int, np.integer, np.bool_)):
+        return float(value)
+    return value
+
+
+def normalised(series: pd.Series) -> pd.Series:
+    """
+    Return the values in a dtype-independent form for hashing: integer, bool and float columns
+    (also object columns holding only numbers) become float64, so the same values hash the same
+    whether a load produced int64 or float64 (e.g. after a null appears in the JSON).
+    Integers above 2**53 lose precision, which is acceptable for change detection.
+    """
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or (
+            pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_complex_dtype(dtype)):
+        # + 0.0 maakt van -0.0 een 0.0
+        return pd.Series(series.to_numpy(dtype=np.float64, na_value=np.nan) + 0.0, index=series.index)
+    if dtype == object and pd.api.types.infer_dtype(series, skipna=True) in NUMERIC_INFERRED:
+        return pd.Series(series.astype(np.float64).to_numpy() + 0.0, index=series.index)
+    return series
+
+
+def _type_tagged(value):
+    # Typelabel voor de hash, anders zijn '1' en 1 gelijk (pandas hasht gemengde kolommen via str)
+    if isinstance(value, (dict, list, tuple)):
+        return canonical(_numbers_as_float(value))
+    if isinstance(value, (bool, int, float, np.number, np.bool_)):
+        return f"number:{float(value)!r}"
+    return f"{type(value).__name__}:{value}"
+
+
+def _salted_hashes(series: pd.Series, salt: int):
+    # Getallen (na normalised() float64) en datums: zout op de bits vóór het hashen; None voor overige dtypes
+    if series.dtype == np.float64:
+        bits = series.to_numpy().view(np.uint64)
+    elif hasattr(series.array, "asi8"):
+        bits = series.array.asi8.view(np.uint64)
+    else:
+        return None
+    return pd.util.hash_array(bits ^ np.uint64(salt))
+
+
+def _combine(hash_arrays: list, start: int = 0x345678, multiplier: int = 1000003) -> np.ndarray:
+    # Combineer kolom-hashes order-afhankelijk (zelfde schema als pandas' combine_hash_arrays)
+    count = len(hash_arrays)
+    multiplier = np.uint64(multiplier)
+    combined = np.full(len(hash_arrays[0]), start, dtype=np.uint64)
+    for i, hashes in enumerate(hash_arrays):
+        combined ^= hashes
+        combined *= multiplier
+        multiplier += np.uint64(82520 + 2 * (count - i))
+    combined += np.uint64(97531)
+    return combined
+
+
+class RowFingerprinter:
+    def __init__(self, bits: int = 64):
+        """
+        Compute stable per-row hashes over scalar and nested columns.
+
+        Parameters:
+        - bits: Fingerprint width, 64 (one uint64 per row) or 128 (two uint64 per row).
+        """
+        if bits not in (64, 128):
+            raise ValueError("bits must be 64 or 128")
+        self.bits = bits
+        self.nested_columns = []
+
+    def _column_hashes(self, df: pd.DataFrame, columns: list, hash_key: str, salt: int) -> list:
+        hash_arrays = []
+        for col in columns:
+            series = normalised(df[col])
+            if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in MIXED_INFERRED:
+                if col not in self.nested_columns and series.map(
+                        lambda value: isinstance(value, (dict, list, tuple)), na_action="ignore").any():
+                    self.nested_columns.append(col)
+                series = series.map(_type_tagged, na_action="ignore")
+            hashes = _salted_hashes(series, salt) if salt else None
+            if hashes is None:
+                try:
+                    # Gevectoriseerde hash voor scalaire kolommen
+                    hashes = pd.util.hash_pandas_object(series, index=False, hash_key=hash_key).to_numpy()
+                except TypeError:
+                    # Geneste waarden (dict/list): eerst canoniek serialiseren
+                    if col not in self.nested_columns:
+                        self.nested_columns.append(col)
+                    hashes = pd.util.hash_pandas_object(
+                        series.map(lambda value: canonical(_numbers_as_float(value)), na_action="ignore"),
+                        index=False, hash_key=hash_key
+                    ).to_numpy()
+            hash_arrays.append(hashes)
+        return hash_arrays
+
+    def row_hashes(self, df: pd.DataFrame, columns: list = None) -> np.ndarray:
+        """
+        Compute the fingerprint of every row.
+
+        Parameters:
+        - df: The DataFrame to fingerprint.
+        - columns: Optional subset of columns (default: all columns, including nested ones).
+
+        Returns:
+        - uint64 array of shape (rows,) for 64 bits, or (rows, 2) for 128 bits.
+        """
+        columns = list(df.columns) if columns is None else list(columns)
+        self.nested_columns = []
+        if not columns:
+            return np.zeros((len(df),) if self.bits == 64 else (len(df), 2), dtype=np.uint64)
+
+        words = [
+            _combine(self._column_hashes(df, columns, key, salt), *constants)
+            for key, salt, constants in list(zip(HASH_KEYS, NUMERIC_SALTS, COMBINE_CONSTANTS))[: self.bits // 64]
+        ]
+        return words[0] if self.bits == 64 else np.column_stack(words)
+
+    def group_ids(self, df: pd.DataFrame, columns: list = None) -> np.ndarray:
+        """
+        Map every row to an integer id; rows with the same fingerprint share an id.
+        """
+        hashes = self.row_hashes(df, columns)
+        if hashes.ndim == 1:
+            return pd.factorize(hashes)[0]
+        high = pd.factorize(hashes[:, 0])[0]
+        low = pd.factorize(hashes[:, 1])[0]
+        return pd.factorize(high.astype(np.int64) * (low.max() + 1) + low)[0]
+
+    def duplicated(self, df: pd.DataFrame, subset: list = None, keep="first") -> pd.Series:
+        """
+        Boolean mask of duplicate rows, like DataFrame.duplicated but over nested columns too.
+        """
+        ids = self.group_ids(df, subset)
+        return pd.Series(pd.Series(ids).duplicated(keep=keep).to_numpy(), index=df.index)
+
+    def duplicate_groups(self, df: pd.DataFrame, subset: list = None) -> pd.DataFrame:
+        """
+        List all rows that belong to a group of two or more identical rows.
+
+        Returns:
+        - DataFrame indexed like df (duplicate rows only) with columns 'group' and 'group_size'.
+        """
+        ids = self.group_ids(df, subset)
+        sizes = np.bincount(ids)[ids] if len(ids) else np.array([], dtype=np.int64)
+        mask = sizes > 1
+        groups = pd.DataFrame({"group": ids[mask], "group_size": sizes[mask]}, index=df.index[mask])
+        return groups.sort_values("group", kind="stable")
+
+    def near_duplicates(self, df: pd.DataFrame, key_columns: list) -> pd.DataFrame:
+        """
+        Find rows that are identical on the key columns but differ elsewhere.
+
+        Parameters:
+        - df: The DataFrame to inspect.
+        - key_columns: Columns that together identify a record (e.g. ['GuLiIOR']).
+
+        Returns:
+        - DataFrame indexed like df with 'group' (shared key) and 'variants' (distinct full rows in the group).
+        """
+        key_ids = self.group_ids(df, key_columns)
+        row_ids = self.group_ids(df)
+        pairs = pd.DataFrame({"group": key_ids, "row": row_ids})
+        variants = pairs.drop_duplicates().groupby("group").size()
+        counts = variants.reindex(key_ids).to_numpy()
+        mask = counts > 1
+        result = pd.DataFrame({"group": key_ids[mask], "variants": counts[mask]}, index=df.index[mask])
+        return result.sort_values("group", kind="stable")
+
+    def fingerprints(self, df: pd.DataFrame, key_columns: list) -> pd.DataFrame:
+        """
+        Emit compact (key hash, row hash) pairs, e.g. to store after a load and diff later.
+
+        Returns:
+        - DataFrame with uint64 columns key_0[, key_1], row_0[, row_1].
+        """
+        key_hashes = self.row_hashes(df, key_columns).reshape(len(df), -1)
+        row_hashes = self.row_hashes(df).reshape(len(df), -1)
+        data = {f"key_{i}": key_hashes[:, i] for i in range(key_hashes.shape[1])}
+        data.update({f"row_{i}": row_hashes[:, i] for i in range(row_hashes.shape[1])})
+        return pd.DataFrame(data)
+
+    @staticmethod
+    def diff(previous: pd.DataFrame, current: pd.DataFrame) -> dict:
+        """
+        Compare two outputs of fingerprints() from consecutive loads.
+
+        Returns:
+        - Dictionary with 'added', 'removed' and 'changed' DataFrames of key hashes.
+        """
+        key_cols = [col for col in current.columns if col.startswith("key_")]
+        row_cols = [col for col in current.columns if col.startswith("row_")]
+        previous = previous.drop_duplicates(key_cols)
+        current = current.drop_duplicates(key_cols)
+
+        # Alleen sleutelkolommen outer-joinen, zodat de uint64 hashes niet naar float gaan
+        keys = previous[key_cols].merge(current[key_cols], on=key_cols, how="outer", indicator=True)
+        common = previous.merge(current, on=key_cols, how="inner", suffixes=("_old", "_new"))
+        changed = np.zeros(len(common), dtype=bool)
+        for col in row_cols:
+            changed |= (common[f"{col}_old"] != common[f"{col}_new"]).to_numpy()
+        return {
+            "added": keys.loc[keys["_merge"] == "right_only", key_cols].reset_index(drop=True),
+            "removed": keys.loc[keys["_merge"] == "left_only", key_cols].reset_index(drop=True),
+            "changed": common.loc[changed, key_cols].reset_index(drop=True),
+        }
@@ -1,146 +1,114 @@
 # -----------------------------
 # Imports and Initial Setup
 # -----------------------------
-from cleanup import DataFrameCleaner
-from loader import load_all_datasets
-from ui import UI
-
+import time
 
-# -----------------------------
-# Load Datasets
-# -----------------------------
-try:
-    df_inkooporderregels, df_ontvangstregels, df_relaties, df_feedback, df_suppliers = load_all_datasets(True)
-except Exception:
-    exit(1)
+from startup_metrics import StartupTimer
 
-# -----------------------------
-# Configuration
-# -----------------------------
-relevant_columns_inkoop = [
-    'GuLiIOR', 'Datum', 'DatumToegezegd', 'AfwijkendeAfleverdatum',
-    'Naam', 'BronRegelGUID', 'QuUn', 'OrNu', 'DsEx', 'StatusOrder', 'Verantwoordelijke'
-]
-relevant_columns_ontvangst = [
-    'BronregelGuid', 'Datum', 'AantalOntvangen', 'Status_regel', 'Itemcode', 'Naam'
-]
-
-inkoop_columns_to_convert = {
-    'Datum': 'datetime',
-    'DatumToegezegd': 'datetime',
-    'AfwijkendeAfleverdatum': 'datetime',
-    'Vrijgegeven_op': 'datetime',
-    'getDate': 'datetime',
-    'Naam': 'str'
-}
-ontvangst_columns_to_convert = {
-    'Datum': 'datetime'
-}
+# Timer als eerste starten, zodat importtijd en time-to-first-paint gemeten worden
+timer = StartupTimer()
 
-# -----------------------------
-# Cleaning
-# -----------------------------
-cleaner_inkoop = DataFrameCleaner(df_inkooporderregels, name="df_inkooporderregels")
-cleaner_inkoop.apply_dtype_mapping(inkoop_columns_to_convert)
-df_inkooporderregels_clean = cleaner_inkoop.get_cleaned_df()[relevant_columns_inkoop].copy()
+import streamlit as st
 
-cleaner_ontvangst = DataFrameCleaner(df_ontvangstregels, name="df_ontvangstregels")
-cleaner_ontvangst.apply_dtype_mapping(ontvangst_columns_to_convert)
-df_ontvangstregels_clean = cleaner_ontvangst.get_cleaned_df()[relevant_columns_ontvangst].copy()
+from dataset_store import DatasetStore
+from dimensions import SupplierDimension
+from pipeline import build_filter_index, publish_order_lines
+from timeseries_store import SupplierTimeSeries
+from ui import UI
+from warmup import BackgroundWarmUp
 
-# -----------------------------
-# Filter: remove irrelevant rows
-# -----------------------------
-# Hier verwijderen we de order regels waarvan standaard geen verzending wordt ingvuld of deze toch niet relevant is
-df_inkooporderregels_clean = df_inkooporderregels_clean[df_inkooporderregels_clean['DsEx'] != 'KVERZEND'].copy()
+timer.mark("imports")
 
-# -----------------------------
-# Determine Expected Delivery Date
-# -----------------------------
-# Bepaal de verwachte leverdatum per regel:
-# Gebruik 'AfwijkendeAfleverdatum' als primaire bron, en val terug op 'DatumToegezegd' indien nodig.
-# Voor de duidelijkheid dit is de datum waarop een order geleverd zou moeten zijn
-df_inkooporderregels_clean['ExpectedDeliveryDate'] = df_inkooporderregels_clean['AfwijkendeAfleverdatum'].combine_first(
-    df_inkooporderregels_clean['DatumToegezegd']
-)
-# Verwijder de kollommen die we nu niet meer nodig hebben
-df_inkooporderregels_clean.drop(columns=['AfwijkendeAfleverdatum', 'DatumToegezegd'], inplace=True)
-
-# Filter regels:
-# - Alleen regels behouden waar zowel 'Datum' (orderdatum) als 'ExpectedDeliveryDate' gevuld is
-# - Alleen regels behouden waar de verwachte leverdatum op of ná de orderdatum ligt
-#   (levering vóór bestelling is niet logisch, dus die regels worden verwijderd)
-df_inkooporderregels_clean = df_inkooporderregels_clean[
-    df_inkooporderregels_clean['ExpectedDeliveryDate'].notna() &  # ExpectedDeliveryDate moet ingevuld zijn
-    df_inkooporderregels_clean['Datum'].notna() &                 # Orderdatum moet ingevuld zijn
-    (df_inkooporderregels_clean['ExpectedDeliveryDate'] >= df_inkooporderregels_clean['Datum'])  # Geen leverdatum vóór orderdatum
-].copy()
-
-# Determine max expected date per order 
-# Dit is de datum waarop de laatste order regel binnen zou moeten zijn en dus de uiteindelijke leverdatum
-latest_expected_per_order = df_inkooporderregels_clean.groupby('OrNu')['ExpectedDeliveryDate'].max()
-
-# Add to dataframe
-df_inkooporderregels_clean['OrderDeliveryDate'] = df_inkooporderregels_clean['OrNu'].map(latest_expected_per_order)
-df_inkooporderregels_clean['OrderDeliveryDate'] = df_inkooporderregels_clean['OrderDeliveryDate'].dt.tz_localize(None)
-df_inkooporderregels_clean['Datum'] = df_inkooporderregels_clean['Datum'].dt.tz_localize(None)
 
 # -----------------------------
-# Delivery Data Preparation
+# Shared Dataset
 # -----------------------------
+# De verrijkte orderregels worden één keer gebouwd en gepubliceerd als read-only, memory-mapped dataset.
+# Alle sessies en serverprocessen koppelen daaraan zonder eigen kopie.
+# Verversen zonder herstart: `python pipeline.py` publiceert een nieuwe versie.
+store = DatasetStore()
 
-# Tel per regel-GUID hoe vaak er een levering op plaatsvond (meerdere leveringen mogelijk)
-delivery_counts = df_ontvangstregels_clean['BronregelGuid'].value_counts()
-
-# Bepaal het totaal aantal ontvangen stuks per regel-GUID
-total_received = df_ontvangstregels_clean.groupby('BronregelGuid')['AantalOntvangen'].sum()
-
-# Analyseer per inkoopregel of en hoeveel er geleverd is
-def analyse_leveringen(df_subset, delivery_counts, total_received):
-    df_subset = df_subset.copy()
-
-    # Aantal keer dat er op deze regel iets is geleverd
-    df_subset['DeliveryCount'] = df_subset['GuLiIOR'].map(delivery_counts).fillna(0).astype(int)
-
-    # Totaal aantal ontvangen eenheden voor deze regel
-    df_subset['TotalReceived'] = df_subset['GuLiIOR'].map(total_received).fillna(0).astype(float)
 
-    # Zorg dat QuUn (besteld aantal) niet NaN is
-    df_subset['QuUn'] = df_subset['QuUn'].fillna(0).astype(float)
+@st.cache_resource
+def start_warm_up():
+    # Eén warm-up per serverproces: laden, opschonen en publiceren op een achtergrondthread
+    return BackgroundWarmUp(lambda progress: publish_order_lines(store, log=True, progress=progress)).start()
 
-    # Markeer of alles volledig is geleverd
-    df_subset['FullyDelivered'] = df_subset['TotalReceived'] >= df_subset['QuUn']
 
-    return df_subset
+@st.cache_resource(max_entries=2)
+def attach_dataset(version: str):
+    # Eén koppeling per versie per proces; een nieuwe versie geeft een nieuwe cache-entry
+    return store.attach(version)
 
-# -----------------------------
-# Delivery Analysis
-# -----------------------------
 
-# Pas leveringsanalyse toe op alle regels met verwachte leverdatum
-df_inkooporderregels_clean = analyse_leveringen(df_inkooporderregels_clean, delivery_counts, total_received)
+@st.cache_resource(max_entries=2)
+def load_timeseries(version: str):
+    # Compacte tijdreeks per leverancier en maand, opgebouwd uit de gepubliceerde maandtotalen
+    tables = attach_dataset(version)
+    if "supplier_months" in tables:
+        return SupplierTimeSeries.from_rollup(tables["supplier_months"])
+    return SupplierTimeSeries.from_order_lines(tables["order_lines"])
 
-# -----------------------------
-# Calculate Delivery Delay
-# -----------------------------
 
-# Bepaal per regel de laatste bekende leverdatum op basis van ontvangstregels
-df_inkooporderregels_clean['DeliveryDate'] = df_inkooporderregels_clean['GuLiIOR'].map(
-    df_ontvangstregels_clean.groupby('BronregelGuid')['Datum'].max()
-)
+@st.cache_resource(max_entries=2)
+def load_suppliers(version: str):
+    # Leveranciersdimensie met hash-index op de natuurlijke sleutels; oudere versies hebben hem nog niet
+    tables = attach_dataset(version)
+    return SupplierDimension(tables["suppliers"]) if "suppliers" in tables else None
 
-# Bereken afwijking tussen werkelijke en verwachte leverdatum (alleen waar beide datums beschikbaar zijn)
-mask = df_inkooporderregels_clean['DeliveryDate'].notna() & df_inkooporderregels_clean['ExpectedDeliveryDate'].notna()
-df_inkooporderregels_clean.loc[mask, 'DeliveryDelay'] = (
-    df_inkooporderregels_clean.loc[mask, 'DeliveryDate'] - df_inkooporderregels_clean.loc[mask, 'ExpectedDeliveryDate']
-).dt.days
 
+version = store.current_version()
+warm_up = None
+if version is None:
+    warm_up = start_warm_up()
+    if warm_up.done and warm_up.error is None:
+        version = store.current_version()
 
 # -----------------------------
-# Optional: Hook up to UI
+# UI
 # -----------------------------
-ui = UI(df_inkooporderregels_clean)
+# Filters eerst, uit het kleine filter-index bestand; de dataset wordt pas daarna gekoppeld.
+# Bij een koude start schrijft de warm-up de index zodra de regels gefilterd zijn.
+filter_index = store.filter_index()
+ui = UI(filter_index=filter_index)
 ui.year_selection()
 ui.supplier_selection()
+timer.mark("first paint")
+
+if "session_started" not in st.session_state:
+    # Alleen de eerste run van een sessie loggen: dat is de start die de gebruiker ervaart
+    st.session_state["session_started"] = timer.start
+    print(f"[startup] {timer.summary()}")
+
+if version is None:
+    fraction, message, done, error = warm_up.status()
+    if error is not None:
+        st.error(f"Loading the dataset failed: {message}")
+        if st.button("Retry"):
+            start_warm_up.clear()
+            st.rerun()
+        st.stop()
+
+    st.progress(fraction, text=f"Preparing dataset: {message} ({warm_up.elapsed:.0f}s)")
+    time.sleep(0.5)
+    st.rerun()
+
+try:
+    tables = attach_dataset(version)
+    timeseries = load_timeseries(version)
+    suppliers = load_suppliers(version)
+except Exception as e:
+    st.error(f"The published dataset could not be opened: {e}")
+    st.stop()
+
+if filter_index is None:
+    # Dataset gepubliceerd vóórdat de filter-index als eigen bestand bestond: één keer aanmaken
+    store.write_filter_index(build_filter_index(tables["order_lines"]))
+    st.rerun()
+
+ui.attach_data(tables["order_lines"], tables.get("orders"), timeseries, suppliers)
 ui.show_date_analysis()
 
+if not st.session_state.get("full_render_logged"):
+    st.session_state["full_render_logged"] = True
+    print(f"[startup] full render after {(time.perf_counter() - st.session_state['session_started']) * 1000:.0f} ms")
@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:  # optioneel; zonder psutil lezen we /proc/self/statm (Linux) of vallen we terug op tracemalloc
+    psutil = None
+
+# Budget in MB via de omgeving, bijv. EDA_MEMORY_BUDGET_MB=4096 (leeg = geen limiet)
+BUDGET_ENV_VAR = "EDA_MEMORY_BUDGET_MB"
+MB = 1024 * 1024
+
+
+def rss_bytes():
+    """
+    Return the resident set size of this process in bytes, or None if it cannot be read.
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def frame_bytes(df, columns: list = None) -> int:
+    """
+    Bytes a full copy of df (or of the given columns) costs. Shallow on purpose: copying an
+    object column copies the pointers, not the Python strings they point to.
+    """
+    if df is None:
+        return 0
+    usage = df.memory_usage(index=True, deep=False)
+    if columns is not None:
+        usage = usage[['Index'] + [col for col in columns if col in usage.index]]
+    return int(usage.sum())
+
+
+class _RssSampler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.peak = rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            current = rss_bytes()
+            if current is not None and (self.peak is None or current > self.peak):
+                self.peak = current
+
+    def __enter__(self):
+        if self.peak is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        current = rss_bytes()
+        if current is not None and (self.peak is None or current > self.peak):
+            self.peak = current
+
+
+class Stage:
+    def __init__(self, budget, name: str, input_bytes: int, copies_full: int, copies_lean: int, eliminates: str,
+                 batchable: bool, extra_bytes: int = 0):
+        self.budget = budget
+        self.name = name
+        self.input_bytes = input_bytes
+        self.copies_full = copies_full
+        self.copies_lean = copies_lean
+        self.eliminates = eliminates
+        self.batchable = batchable
+        self.extra_bytes = extra_bytes
+        self.rss_before = rss_bytes()
+        # Voorspellen vanaf het huidige geheugengebruik (RSS, of tracemalloc als RSS niet leesbaar is), nooit vanaf 0
+        self.baseline = budget.current_bytes()
+        # extra_bytes (nieuwe kolommen, tijdelijke arrays) komen in elke variant bovenop de kopieën
+        self.predicted_full = self.baseline + input_bytes * copies_full + extra_bytes
+        self.predicted_lean = self.baseline + input_bytes * copies_lean + extra_bytes
+        self.variant = budget.choose(self)
+
+    @property
+    def lean(self) -> bool:
+        return self.variant in ("lean", "batched")
+
+    @property
+    def batched(self) -> bool:
+        return self.variant == "batched"
+
+
+class MemoryBudget:
+    def __init__(self, limit_mb: float = None, trace_python: bool = False, sample_interval: float = 0.02,
+                 batch_rows: int = 250_000, log_enabled: bool = False):
+        """
+        Track peak memory per pipeline stage and pick lean (copy-free) or batched variants
+        for stages that are predicted to exceed the budget.
+
+        Parameters:
+        - limit_mb: Memory budget for the process in MB (default: EDA_MEMORY_BUDGET_MB, else no limit).
+        - trace_python: If True, also measure per-stage peaks with tracemalloc (slower). Forced on,
+          with a warning, when the process RSS cannot be read (no psutil and no /proc, e.g. on Windows).
+        - sample_interval: Seconds between RSS samples while a stage runs.
+        - batch_rows: Rows per batch for stages that run batched.
+        - log_enabled: If True, log messages will be printed to stdout.
+        """
+        if limit_mb is None and os.environ.get(BUDGET_ENV_VAR):
+            limit_mb = float(os.environ[BUDGET_ENV_VAR])
+        self.limit_bytes = int(limit_mb * MB) if limit_mb else None
+        self.trace_python = trace_python
+        self.sample_interval = sample_interval
+        self.batch_rows = batch_rows
+        self.log_enabled = log_enabled
+        self.records = []
+        self.rss_available = rss_bytes() is not None
+        self._started_tracing = False
+        if not self.rss_available:
+            print("[memory] Warning: process RSS cannot be read (install psutil); falling back to tracemalloc, "
+                  "which only sees Python and NumPy allocations.")
+            self.trace_python = True
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+
+    def current_bytes(self) -> int:
+        """
+        Current memory use: RSS, or the memory traced by tracemalloc when RSS cannot be read.
+        """
+        if self.rss_available:
+            current = rss_bytes()
+            if current is not None:
+                return current
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        return tracemalloc.get_traced_memory()[0]
+
+    def close(self):
+        """
+        Stop tracemalloc if this budget started it (the measured records are kept).
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _log(self, message: str):
+        if self.log_enabled:
+            print(message)
+
+    def choose(self, stage: Stage) -> str:
+        if self.limit_bytes is None or stage.copies_full <= stage.copies_lean:
+            return "full"
+        if stage.predicted_full <= self.limit_bytes:
+            return "full"
+        if stage.predicted_lean <= self.limit_bytes or not stage.batchable:
+            return "lean"
+        return "batched"
+
+    def stage(self, name: str, df=None, copies_full: int = 0, copies_lean: int = 0, eliminates: str = "",
+              columns: list = None, batchable: bool = False, extra_bytes: int = 0):
+        """
+        Context manager around one pipeline stage.
+
+        Parameters:
+        - name: Stage name used in the report.
+        - df: Frame the stage copies (its size drives the prediction).
+        - columns: Only count these columns of df (e.g. the projection of a stage).
+        - copies_full: Full-frame copies the original variant makes.
+        - copies_lean: Full-frame copies the lean variant makes.
+        - eliminates: Description of the copies the lean variant avoids.
+        - batchable: If True, the stage also has a batched variant for when even the lean one does not fit.
+        - extra_bytes: Bytes the stage allocates in every variant (new columns, temporaries).
+
+        Yields:
+        - Stage object; check stage.lean / stage.batched to pick the variant.
+        """
+        return _StageContext(self, Stage(self, name, frame_bytes(df, columns), copies_full, copies_lean, eliminates,
+                                         batchable, extra_bytes))
+
+    def report(self) -> pd.DataFrame:
+        """
+        Per-stage overview: chosen variant, predicted and measured peaks, eliminated copies and the
+        estimated saving (saved_mb: shallow bytes of the skipped copies, not a measured difference).
+        """
+        columns = ["stage", "variant", "predicted_peak_mb", "peak_rss_mb", "rss_growth_mb",
+                   "python_peak_mb", "eliminated_copies", "saved_mb", "seconds"]
+        return pd.DataFrame(self.records, columns=columns)
+
+    def summary(self) -> str:
+        report = self.report()
+        if report.empty:
+            return "No stages measured."
+        lines = [f"Memory budget: {self.limit_bytes / MB:.0f} MB" if self.limit_bytes else "Memory budget: none"]
+        for row in report.itertuples():
+            if self.rss_available:
+                line = f"- {row.stage}: {row.variant}, peak RSS {row.peak_rss_mb:.0f} MB"
+            else:
+                line = f"- {row.stage}: {row.variant}, traced growth {row.python_peak_mb:.0f} MB"
+            if row.eliminated_copies:
+                line += f", eliminated {row.eliminated_copies} (est. ~{row.saved_mb:.0f} MB)"
+            lines.append(line)
+        # Schatting: ondiepe bytes van de overgeslagen kopieën, geen gemeten verschil in piekgeheugen
+        lines.append(f"Total estimated saving (shallow bytes of skipped copies, not a measured peak difference): "
+                     f"{report['saved_mb'].sum():.0f} MB")
+        return "\n".join(lines)
+
+
+class _StageContext:
+    def __init__(self, budget: MemoryBudget, stage: Stage):
+        self.budget = budget
+        self.stage = stage
+
+    def __enter__(self) -> Stage:
+        self._started_tracing = False
+        if self.budget.trace_python:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+            self._traced_before = tracemalloc.get_traced_memory()[0]
+        self._sampler = _RssSampler(self.budget.sample_interval).__enter__()
+        self._start = time.perf_counter()
+        return self.stage
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        self._sampler.__exit__(exc_type, exc, tb)
+        python_peak = None
+        if self.budget.trace_python:
+            python_peak = (tracemalloc.get_traced_memory()[1] - self._traced_before) / MB
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        stage = self.stage
+        saved = stage.input_bytes * (stage.copies_full - stage.copies_lean) if stage.lean else 0
+        peak = self._sampler.peak
+        before = stage.rss_before
+        self.budget.records.append({
+            "stage": stage.name,
+            "variant": stage.variant,
+            "predicted_peak_mb": (stage.predicted_lean if stage.lean else stage.predicted_full) / MB,
+            "peak_rss_mb": peak / MB if peak is not None else float("nan"),
+            "rss_growth_mb": (peak - before) / MB if peak is not None and before is not None else float("nan"),
+            "python_peak_mb": python_peak,
+            "eliminated_copies": stage.eliminates if stage.lean else "",
+            "saved_mb": saved / MB,
+            "seconds": seconds,
+        })
+        self.budget._log(f"[memory] {stage.name}: {stage.variant}")
+        return False
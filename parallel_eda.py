@@ -0,0 +1,220 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from fingerprint import hashable_series
+
+# dtype kinds die als platte numpy-array via shared memory gedeeld kunnen worden
+SHAREABLE_KINDS = "biufmM"
+
+
+def column_hash(series: pd.Series) -> str:
+    """
+    Compute a content hash for a single column (values and dtype, not the index).
+
+    Parameters:
+    - series: The column to hash.
+
+    Returns:
+    - Hex digest that changes whenever any value in the column changes.
+    """
+    row_hashes = pd.util.hash_pandas_object(hashable_series(series), index=False).to_numpy()
+    digest = hashlib.blake2b(row_hashes.tobytes(), digest_size=16)
+    digest.update(str(series.dtype).encode())
+    return digest.hexdigest()
+
+
+def _profile_column(series: pd.Series, top_n: int) -> dict:
+    # Zelfde statistieken als de losse EDAService-stappen, maar dan per kolom
+    total = len(series)
+    missing = int(series.isna().sum())
+    values = hashable_series(series)
+    profile = {
+        "dtype": str(series.dtype),
+        "rows": total,
+        "missing": missing,
+        "null_percentage": round(missing / total * 100, 2) if total else 0.0,
+        "unique": int(values.nunique(dropna=False)),
+    }
+
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        profile["summary"] = series.describe().to_dict()
+        profile["min"] = series.min()
+        profile["max"] = series.max()
+    elif pd.api.types.is_datetime64_any_dtype(series):
+        profile["min"] = series.min()
+        profile["max"] = series.max()
+    else:
+        profile["top_values"] = values.value_counts().head(top_n).to_dict()
+    return profile
+
+
+def _profile_codes(codes: np.ndarray, uniques: list, dtype: str, top_n: int) -> dict:
+    # Zelfde profiel als _profile_column voor tekst/gemengde kolommen, maar op gefactoriseerde codes
+    total = len(codes)
+    known = codes >= 0
+    missing = int(total - known.sum())
+    counts = np.bincount(codes[known], minlength=len(uniques))
+    order = np.argsort(-counts, kind="stable")[:top_n]
+    return {
+        "dtype": dtype,
+        "rows": total,
+        "missing": missing,
+        "null_percentage": round(missing / total * 100, 2) if total else 0.0,
+        "unique": len(uniques) + (1 if missing else 0),
+        "top_values": {uniques[i]: int(counts[i]) for i in order if counts[i] > 0},
+    }
+
+
+def _profile_batch(tasks: list, top_n: int) -> dict:
+    """
+    Worker entry point: profile a batch of columns. Numeric/datetime columns and the codes of
+    factorized text columns are attached from shared memory; other columns arrive as pickled series.
+    """
+    results = {}
+    for task in tasks:
+        if task[0] in ("shm", "codes"):
+            _, name, shm_name, dtype_str, length = task[:5]
+            shm = shared_memory.SharedMemory(name=shm_name)
+            try:
+                array = np.ndarray((length,), dtype=np.dtype(dtype_str), buffer=shm.buf)
+                if task[0] == "codes":
+                    _, _, _, _, _, uniques, column_dtype = task
+                    results[name] = _profile_codes(array, uniques, column_dtype, top_n)
+                else:
+                    results[name] = _profile_column(pd.Series(array, name=name, copy=False), top_n)
+                del array
+            finally:
+                shm.close()
+        else:
+            _, name, series = task
+            results[name] = _profile_column(series, top_n)
+    return results
+
+
+class ParallelEDAExecutor:
+    def __init__(self, max_workers: int = None, top_n: int = 5, log_enabled: bool = False):
+        """
+        Profile DataFrame columns in parallel worker processes, with a per-column cache.
+
+        Parameters:
+        - max_workers: Number of worker processes (default: CPU count). 1 runs in-process.
+        - top_n: Number of most frequent values kept for non-numeric columns.
+        - log_enabled: If True, log messages will be printed to stdout.
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.top_n = top_n
+        self.log_enabled = log_enabled
+        self.last_recomputed = []
+        self._cache = {}
+        self._pool = None
+
+    def _log(self, message: str):
+        if self.log_enabled:
+            print(message)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """
+        Shut down the worker pool (the cache is kept).
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _split(self, tasks: list, sizes: list) -> list:
+        # Verdeel de kolommen over de workers, grootste kolommen eerst (greedy op bytes)
+        buckets = [[] for _ in range(min(self.max_workers, len(tasks)))]
+        loads = [0] * len(buckets)
+        for size, task in sorted(zip(sizes, tasks), key=lambda pair: pair[0], reverse=True):
+            target = loads.index(min(loads))
+            buckets[target].append(task)
+            loads[target] += size
+        return buckets
+
+    def profile(self, df: pd.DataFrame, columns: list = None) -> dict:
+        """
+        Profile the given columns, recomputing only columns whose content changed
+        since a previous call.
+
+        Parameters:
+        - df: The DataFrame to profile.
+        - columns: Optional subset of column names (default: all columns).
+
+        Returns:
+        - Dictionary mapping column name to its profile dictionary.
+        """
+        columns = list(df.columns) if columns is None else [col for col in columns if col in df.columns]
+
+        keys = {col: column_hash(df[col]) for col in columns}
+        results = {col: self._cache[key] for col, key in keys.items() if key in self._cache}
+        todo = [col for col in columns if col not in results]
+        self.last_recomputed = todo
+        self._log(f"Cached columns: {len(results)}, recomputing: {len(todo)}")
+        if not todo:
+            return {col: results[col] for col in columns}
+
+        if self.max_workers == 1 or len(todo) == 1:
+            computed = _profile_batch([("obj", col, df[col]) for col in todo], self.top_n)
+        else:
+            computed = self._profile_parallel(df, todo)
+
+        for col in todo:
+            self._cache[keys[col]] = computed[col]
+            results[col] = computed[col]
+        return {col: results[col] for col in columns}
+
+    @staticmethod
+    def _share(array: np.ndarray, blocks: list) -> str:
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        blocks.append(shm)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+        return shm.name
+
+    def _profile_parallel(self, df: pd.DataFrame, todo: list) -> dict:
+        blocks = []
+        tasks = []
+        sizes = []
+        try:
+            for col in todo:
+                series = df[col]
+                dtype = series.dtype
+                if isinstance(dtype, np.dtype) and dtype.kind in SHAREABLE_KINDS:
+                    # Kolom eenmalig in shared memory zetten; workers lezen zonder pickle-kopie
+                    array = series.to_numpy()
+                    tasks.append(("shm", col, self._share(array, blocks), array.dtype.str, len(array)))
+                    sizes.append(array.nbytes)
+                elif not (pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)):
+                    # Tekst, gemengde en geneste kolommen: codes via shared memory, alleen de unieke waarden gepickled
+                    codes, uniques = pd.factorize(hashable_series(series))
+                    tasks.append(("codes", col, self._share(codes, blocks), codes.dtype.str, len(codes),
+                                  list(uniques), str(dtype)))
+                    sizes.append(codes.nbytes)
+                else:
+                    tasks.append(("obj", col, series))
+                    sizes.append(int(series.memory_usage(deep=False)))
+
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            futures = [self._pool.submit(_profile_batch, bucket, self.top_n) for bucket in self._split(tasks, sizes)]
+
+            computed = {}
+            for future in futures:
+                computed.update(future.result())
+            return computed
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
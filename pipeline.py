@@ -0,0 +1,423 @@
+# -----------------------------
+# Imports and Initial Setup
+# -----------------------------
+import numpy as np
+import pandas as pd
+
+from cleanup import DataFrameCleaner
+from dimensions import SupplierDimension
+from loader import load_all_datasets
+from memory_budget import MemoryBudget
+from timeseries_store import SupplierTimeSeries, month_number
+
+
+# -----------------------------
+# Configuration
+# -----------------------------
+relevant_columns_inkoop = [
+    'GuLiIOR', 'Datum', 'DatumToegezegd', 'AfwijkendeAfleverdatum',
+    'Naam', 'BronRegelGUID', 'QuUn', 'OrNu', 'DsEx', 'StatusOrder', 'Verantwoordelijke'
+]
+relevant_columns_ontvangst = [
+    'BronregelGuid', 'Datum', 'AantalOntvangen', 'Status_regel', 'Itemcode', 'Naam'
+]
+
+# Bij verversen worden de laatste maanden van de vorige tijdreeks opnieuw berekend (late ontvangsten
+# wijzigen nog recente orders); oudere maanden worden overgenomen. `python pipeline.py --full` bouwt alles opnieuw.
+TIMESERIES_REOPEN_MONTHS = 3
+
+# Bytes per regel die de leveringsanalyse toevoegt, in elke variant: DeliveryCount, TotalReceived, een nieuwe QuUn,
+# FullyDelivered en DeliveryDate, plus de tijdelijke arrays van één .map (indexer, resultaat, fillna)
+ANALYSE_BYTES_PER_ROW = 8 + 8 + 8 + 1 + 8 + 3 * 8
+
+# Per-regel sleutels die alleen de pipeline nodig heeft; het dashboard koppelt via OrderKey en SupplierKey,
+# dus deze (vrijwel unieke) tekstkolommen worden niet mee gepubliceerd
+unpublished_line_columns = ['GuLiIOR', 'BronRegelGUID', 'OrNu']
+
+inkoop_columns_to_convert = {
+    'Datum': 'datetime',
+    'DatumToegezegd': 'datetime',
+    'AfwijkendeAfleverdatum': 'datetime',
+    'Vrijgegeven_op': 'datetime',
+    'getDate': 'datetime',
+    'Naam': 'str'
+}
+ontvangst_columns_to_convert = {
+    'Datum': 'datetime'
+}
+
+
+# Analyseer per inkoopregel of en hoeveel er geleverd is
+# inplace=True slaat de kopie van de regels over; batch_rows zoekt de ontvangsten per blok regels op
+def analyse_leveringen(df_subset, delivery_counts, total_received, inplace=False, batch_rows=None):
+    if not inplace:
+        df_subset = df_subset.copy()
+
+    if batch_rows is None:
+        # Aantal keer dat er op deze regel iets is geleverd
+        df_subset['DeliveryCount'] = df_subset['GuLiIOR'].map(delivery_counts).fillna(0).astype(int)
+
+        # Totaal aantal ontvangen eenheden voor deze regel
+        df_subset['TotalReceived'] = df_subset['GuLiIOR'].map(total_received).fillna(0).astype(float)
+    else:
+        df_subset['DeliveryCount'] = map_batched(df_subset['GuLiIOR'], delivery_counts, batch_rows, 0).astype(int)
+        df_subset['TotalReceived'] = map_batched(df_subset['GuLiIOR'], total_received, batch_rows, 0).astype(float)
+
+    # Zorg dat QuUn (besteld aantal) niet NaN is
+    df_subset['QuUn'] = df_subset['QuUn'].fillna(0).astype(float)
+
+    # Markeer of alles volledig is geleverd
+    df_subset['FullyDelivered'] = df_subset['TotalReceived'] >= df_subset['QuUn']
+
+    return df_subset
+
+
+def map_batched(keys: pd.Series, mapping: pd.Series, batch_rows: int, fill_value=None) -> pd.Series:
+    """
+    Equivalent of keys.map(mapping).fillna(fill_value) for a uniquely indexed mapping, but the lookup
+    runs per batch of rows, so only one batch of intermediate arrays is in memory at a time.
+    """
+    positions = np.empty(len(keys), dtype=np.intp)
+    for start in range(0, len(keys), batch_rows):
+        positions[start:start + batch_rows] = mapping.index.get_indexer(keys.iloc[start:start + batch_rows])
+    values = pd.api.extensions.take(mapping.array, positions, allow_fill=True, fill_value=fill_value)
+    return pd.Series(values, index=keys.index, name=keys.name)
+
+
+def _select_rows(df, mask, lean: bool):
+    # Lean: één kopie via take in plaats van boolean indexing plus .copy()
+    if lean:
+        return df.take(np.flatnonzero(mask.to_numpy()))
+    return df[mask].copy()
+
+
+def _project(df, columns: list, lean: bool):
+    if lean:
+        return df.take(df.columns.get_indexer(columns), axis=1)
+    return df[columns].copy()
+
+
+def _report(progress, fraction: float, message: str):
+    if progress is not None:
+        progress(fraction, message)
+
+
+def build_order_lines(log: bool = False, progress=None, budget: MemoryBudget = None, filter_index_sink=None):
+    """
+    Load, clean and enrich the purchase order lines with delivery information.
+
+    Parameters:
+    - log: If True, loader progress is printed to stdout.
+    - progress: Optional callback progress(fraction, message), called between stages.
+    - budget: Optional MemoryBudget; stages predicted to exceed it run without full-frame copies
+      or in batches. Default: a budget from EDA_MEMORY_BUDGET_MB (no limit when unset).
+    - filter_index_sink: Optional callback receiving the filter index as soon as the lines are
+      filtered, so the filter widgets can render before the enrichment is done.
+
+    Returns:
+    - Tuple (order lines, order facts, supplier dimension): one row per order line and one row
+      per order, linked through OrderKey; both refer to the supplier dimension through SupplierKey.
+    """
+    own_budget = budget is None
+    budget = budget or MemoryBudget(log_enabled=log)
+    try:
+        return _build_order_lines(log, progress, budget, filter_index_sink)
+    finally:
+        # Ook als een stage faalt: tracemalloc niet aan laten staan
+        if own_budget:
+            budget.close()
+
+
+def _build_order_lines(log: bool, progress, budget: MemoryBudget, filter_index_sink):
+    # -----------------------------
+    # Load Datasets
+    # -----------------------------
+    _report(progress, 0.0, "Loading datasets")
+    with budget.stage("load"):
+        df_inkooporderregels, df_ontvangstregels, df_relaties, df_feedback, df_suppliers = load_all_datasets(log)
+
+    # -----------------------------
+    # Cleaning
+    # -----------------------------
+    _report(progress, 0.5, "Cleaning order and receipt lines")
+    with budget.stage("clean"):
+        cleaner_inkoop = DataFrameCleaner(df_inkooporderregels, name="df_inkooporderregels")
+        cleaner_inkoop.apply_dtype_mapping(inkoop_columns_to_convert)
+        cleaner_ontvangst = DataFrameCleaner(df_ontvangstregels, name="df_ontvangstregels")
+        cleaner_ontvangst.apply_dtype_mapping(ontvangst_columns_to_convert)
+
+    # Projectie: onder copy-on-write is de kolomselectie (df[cols] of take) lui; alleen de .copy() kopieert
+    with budget.stage("project order lines", df_inkooporderregels, 1, 0, "projection .copy()",
+                      columns=relevant_columns_inkoop) as stage:
+        df_inkooporderregels_clean = _project(cleaner_inkoop.get_cleaned_df(), relevant_columns_inkoop, stage.lean)
+    with budget.stage("project receipts", df_ontvangstregels, 1, 0, "projection .copy()",
+                      columns=relevant_columns_ontvangst) as stage:
+        df_ontvangstregels_clean = _project(cleaner_ontvangst.get_cleaned_df(), relevant_columns_ontvangst, stage.lean)
+
+    # De ruwe exports zijn na de projectie niet meer nodig; loslaten zodat ze niet tot het einde blijven staan
+    del df_inkooporderregels, df_ontvangstregels, cleaner_inkoop, cleaner_ontvangst
+
+    # -----------------------------
+    # Filter: remove irrelevant rows
+    # -----------------------------
+    _report(progress, 0.65, "Determining expected delivery dates")
+    # Hier verwijderen we de order regels waarvan standaard geen verzending wordt ingvuld of deze toch niet relevant is
+    with budget.stage("filter KVERZEND", df_inkooporderregels_clean, 2, 1, "KVERZEND filter .copy()") as stage:
+        df_inkooporderregels_clean = _select_rows(
+            df_inkooporderregels_clean, df_inkooporderregels_clean['DsEx'] != 'KVERZEND', stage.lean
+        )
+
+    # -----------------------------
+    # Determine Expected Delivery Date
+    # -----------------------------
+    # Bepaal de verwachte leverdatum per regel:
+    # Gebruik 'AfwijkendeAfleverdatum' als primaire bron, en val terug op 'DatumToegezegd' indien nodig.
+    # Voor de duidelijkheid dit is de datum waarop een order geleverd zou moeten zijn
+    df_inkooporderregels_clean['ExpectedDeliveryDate'] = df_inkooporderregels_clean['AfwijkendeAfleverdatum'].combine_first(
+        df_inkooporderregels_clean['DatumToegezegd']
+    )
+    # Verwijder de kollommen die we nu niet meer nodig hebben
+    df_inkooporderregels_clean.drop(columns=['AfwijkendeAfleverdatum', 'DatumToegezegd'], inplace=True)
+
+    # Filter regels:
+    # - Alleen regels behouden waar zowel 'Datum' (orderdatum) als 'ExpectedDeliveryDate' gevuld is
+    # - Alleen regels behouden waar de verwachte leverdatum op of ná de orderdatum ligt
+    #   (levering vóór bestelling is niet logisch, dus die regels worden verwijderd)
+    with budget.stage("filter dates", df_inkooporderregels_clean, 2, 1, "date filter .copy()") as stage:
+        df_inkooporderregels_clean = _select_rows(
+            df_inkooporderregels_clean,
+            df_inkooporderregels_clean['ExpectedDeliveryDate'].notna() &  # ExpectedDeliveryDate moet ingevuld zijn
+            df_inkooporderregels_clean['Datum'].notna() &                 # Orderdatum moet ingevuld zijn
+            (df_inkooporderregels_clean['ExpectedDeliveryDate'] >= df_inkooporderregels_clean['Datum']),  # Geen leverdatum vóór orderdatum
+            stage.lean
+        )
+
+    # De orderleverdatum (laatste verwachte regeldatum per order) komt verderop uit de order-feitentabel
+    df_inkooporderregels_clean['Datum'] = df_inkooporderregels_clean['Datum'].dt.tz_localize(None)
+    if filter_index_sink is not None:
+        filter_index_sink(build_filter_index(df_inkooporderregels_clean))
+
+    # -----------------------------
+    # Delivery Data Preparation
+    # -----------------------------
+    _report(progress, 0.8, "Matching receipts to order lines")
+
+    # Tel per regel-GUID hoe vaak er een levering op plaatsvond (meerdere leveringen mogelijk)
+    delivery_counts = df_ontvangstregels_clean['BronregelGuid'].value_counts()
+
+    # Bepaal het totaal aantal ontvangen stuks per regel-GUID
+    total_received = df_ontvangstregels_clean.groupby('BronregelGuid')['AantalOntvangen'].sum()
+
+    # -----------------------------
+    # Delivery Analysis
+    # -----------------------------
+
+    # Pas leveringsanalyse toe op alle regels met verwachte leverdatum
+    with budget.stage("analyse deliveries", df_inkooporderregels_clean, 1, 0, "analyse_leveringen .copy()",
+                      batchable=True, extra_bytes=len(df_inkooporderregels_clean) * ANALYSE_BYTES_PER_ROW) as stage:
+        batch_rows = budget.batch_rows if stage.batched else None
+        df_inkooporderregels_clean = analyse_leveringen(
+            df_inkooporderregels_clean, delivery_counts, total_received, inplace=stage.lean, batch_rows=batch_rows
+        )
+
+        # -----------------------------
+        # Calculate Delivery Delay
+        # -----------------------------
+
+        # Bepaal per regel de laatste bekende leverdatum op basis van ontvangstregels
+        last_receipt = df_ontvangstregels_clean.groupby('BronregelGuid')['Datum'].max()
+        if batch_rows is None:
+            df_inkooporderregels_clean['DeliveryDate'] = df_inkooporderregels_clean['GuLiIOR'].map(last_receipt)
+        else:
+            df_inkooporderregels_clean['DeliveryDate'] = map_batched(
+                df_inkooporderregels_clean['GuLiIOR'], last_receipt, batch_rows
+            )
+
+    # Bereken afwijking tussen werkelijke en verwachte leverdatum (alleen waar beide datums beschikbaar zijn)
+    mask = df_inkooporderregels_clean['DeliveryDate'].notna() & df_inkooporderregels_clean['ExpectedDeliveryDate'].notna()
+    df_inkooporderregels_clean.loc[mask, 'DeliveryDelay'] = (
+        df_inkooporderregels_clean.loc[mask, 'DeliveryDate'] - df_inkooporderregels_clean.loc[mask, 'ExpectedDeliveryDate']
+    ).dt.days
+
+    # -----------------------------
+    # Supplier Dimension
+    # -----------------------------
+    # Eén keer koppelen aan de leveranciersdimensie; daarna groeperen en filteren op de integer SupplierKey
+    _report(progress, 0.85, "Joining supplier master data")
+    with budget.stage("supplier dimension"):
+        suppliers = SupplierDimension.build(df_inkooporderregels_clean['Naam'], df_relaties, df_suppliers, df_feedback)
+        df_inkooporderregels_clean['SupplierKey'] = suppliers.keys(df_inkooporderregels_clean['Naam'])
+
+    # -----------------------------
+    # Order Facts
+    # -----------------------------
+    _report(progress, 0.9, "Building order facts")
+    with budget.stage("order facts"):
+        df_orders = build_order_facts(df_inkooporderregels_clean)
+        df_orders['SupplierKey'] = suppliers.keys(df_orders['Naam'])
+
+    # Gedeelde sleutel: elke regel verwijst met OrderKey naar zijn rij in de order-feitentabel
+    # (-1 voor regels zonder OrNu: de groupby laat die weg, dus zij hebben geen order)
+    order_key = pd.Index(df_orders['OrNu']).get_indexer(df_inkooporderregels_clean['OrNu'])
+    df_inkooporderregels_clean['OrderKey'] = order_key
+    order_delivery_dates = df_orders['OrderDeliveryDate'].to_numpy()
+    if len(order_delivery_dates):
+        df_inkooporderregels_clean['OrderDeliveryDate'] = np.where(
+            order_key >= 0, order_delivery_dates[np.maximum(order_key, 0)], np.datetime64('NaT')
+        )
+    else:
+        # Geen enkele regel heeft een OrNu: er zijn geen orders om een datum uit over te nemen
+        df_inkooporderregels_clean['OrderDeliveryDate'] = np.full(len(order_key), np.datetime64('NaT'),
+                                                                  dtype=order_delivery_dates.dtype)
+
+    _report(progress, 1.0, "Order lines ready")
+    if log:
+        print(budget.summary())
+    return df_inkooporderregels_clean, df_orders, suppliers
+
+
+def delay_category(delay: pd.Series) -> pd.Series:
+    """
+    Classify delivery delays in days as 'Early', 'On Time' or 'Late'.
+    Missing delays (nothing received yet) count as 'Late'.
+    """
+    category = np.select([delay < 0, delay == 0], ['Early', 'On Time'], default='Late')
+    return pd.Series(pd.Categorical(category, categories=['Early', 'On Time', 'Late']), index=delay.index)
+
+
+def build_order_facts(df_lines):
+    """
+    Materialise one row per order from the enriched order lines.
+
+    Parameters:
+    - df_lines: Order lines as built by build_order_lines().
+
+    Returns:
+    - pandas DataFrame with one row per order; its row position is the OrderKey.
+    """
+    df_orders = df_lines.groupby('OrNu', observed=True, sort=True).agg(
+        OrderDate=('Datum', 'min'),
+        Naam=('Naam', 'first'),
+        # Dit is de datum waarop de laatste order regel binnen zou moeten zijn en dus de uiteindelijke leverdatum
+        OrderDeliveryDate=('ExpectedDeliveryDate', 'max'),
+        LastReceiptDate=('DeliveryDate', 'max'),
+        AllLinesDelivered=('FullyDelivered', 'all'),
+        LineCount=('GuLiIOR', 'size'),
+    ).reset_index()
+
+    df_orders['OrderDeliveryDate'] = df_orders['OrderDeliveryDate'].dt.tz_localize(None)
+    if isinstance(df_orders['LastReceiptDate'].dtype, pd.DatetimeTZDtype):
+        df_orders['LastReceiptDate'] = df_orders['LastReceiptDate'].dt.tz_convert('UTC').dt.tz_localize(None)
+    df_orders['OrderYear'] = df_orders['OrderDate'].dt.year
+    df_orders['DeliveryDelay'] = (df_orders['LastReceiptDate'] - df_orders['OrderDeliveryDate']).dt.days
+    df_orders['Category'] = delay_category(df_orders['DeliveryDelay'])
+    df_orders['OrderKey'] = np.arange(len(df_orders))
+    return df_orders
+
+
+def build_filter_index(df):
+    """
+    Build the lightweight index the filter widgets need (years and suppliers per year),
+    small enough to store next to a published dataset and render before it is loaded.
+    """
+    pairs = pd.DataFrame({'Year': df['Datum'].dt.year, 'Naam': df['Naam'].astype(object)}).dropna().drop_duplicates()
+    suppliers = {
+        str(int(year)): sorted(map(str, group['Naam']))
+        for year, group in pairs.groupby('Year')
+    }
+    return {'years': sorted(int(year) for year in pairs['Year'].unique()), 'suppliers': suppliers}
+
+
+def build_supplier_timeseries(df_lines, previous_rollup=None, reopen_months: int = TIMESERIES_REOPEN_MONTHS,
+                              log: bool = False):
+    """
+    Build the supplier x month time series. With the rollup of the previous version, only the
+    last `reopen_months` months of it (and anything newer) are recomputed from the lines; older
+    months are taken over, after checking them against the lines (see _carried_months_match).
+
+    Parameters:
+    - df_lines: Enriched order lines.
+    - previous_rollup: Optional 'supplier_months' table of the previous version.
+    - reopen_months: Number of trailing months of the previous rollup that are recomputed.
+    - log: If True, a fallback to a full rebuild is printed to stdout.
+
+    Returns:
+    - SupplierTimeSeries.
+    """
+    if previous_rollup is None or previous_rollup.empty:
+        return SupplierTimeSeries.from_order_lines(df_lines)
+    cutoff = int(previous_rollup['Month'].max()) - reopen_months + 1
+    months = month_number(df_lines['Datum'])
+    carried = previous_rollup[previous_rollup['Month'].to_numpy() < cutoff]
+    if not _carried_months_match(carried, df_lines[months < cutoff]):
+        # Late ontvangsten, regels die KVERZEND werden of verwijderde regels in oudere maanden: alles opnieuw
+        if log:
+            print("Time series: carried months differ from the order lines; rebuilding all months")
+        return SupplierTimeSeries.from_order_lines(df_lines)
+    timeseries = SupplierTimeSeries.from_rollup(previous_rollup)
+    timeseries.truncate(cutoff)
+    timeseries.append(df_lines[months >= cutoff])
+    return timeseries
+
+
+def _carried_months_match(carried, df_lines) -> bool:
+    # Aantal regels en leveringen per (leverancier, maand) van de overgenomen maanden moet gelijk zijn aan
+    # wat de regels van deze versie geven; anders zijn oudere maanden gewijzigd
+    df_lines = df_lines[df_lines['Naam'].notna() & df_lines['Datum'].notna()]
+    expected = pd.DataFrame({
+        'Naam': df_lines['Naam'].astype(object).to_numpy(),
+        'Month': month_number(df_lines['Datum']),
+        'lines': 1.0,
+        'deliveries': df_lines['DeliveryCount'].to_numpy(dtype=np.float64),
+    }).groupby(['Naam', 'Month']).sum().sort_index()
+    actual = pd.DataFrame({
+        'Naam': carried['Naam'].astype(object).to_numpy(),
+        'Month': carried['Month'].to_numpy(dtype=np.int64),
+        'lines': carried['lines'].to_numpy(dtype=np.float64),
+        'deliveries': carried['deliveries'].to_numpy(dtype=np.float64),
+    }).set_index(['Naam', 'Month']).sort_index()
+    return actual.index.equals(expected.index) and np.allclose(actual.to_numpy(), expected.to_numpy())
+
+
+def _previous_rollup(store):
+    version = store.current_version()
+    if version is None or "supplier_months" not in store.manifest(version)["tables"]:
+        return None
+    return store.attach(version)["supplier_months"]
+
+
+def publish_order_lines(store, log: bool = False, progress=None, budget: MemoryBudget = None,
+                        full_rebuild: bool = False) -> str:
+    """
+    Build the order lines and publish them as a new store version, and store the filter index next to it.
+    The supplier time series is extended from the previous version unless full_rebuild is True.
+    """
+    # Bij een koude start (nog geen index) de index al schrijven zodra de regels gefilterd zijn;
+    # anders pas na het publiceren, zodat de filters niet vooruitlopen op de gekoppelde data
+    sink = store.write_filter_index if store.filter_index() is None else None
+    df_order_lines, df_orders, suppliers = build_order_lines(
+        log=log, progress=progress, budget=budget, filter_index_sink=sink
+    )
+    _report(progress, 1.0, "Publishing dataset")
+    previous_rollup = None if full_rebuild else _previous_rollup(store)
+    timeseries = build_supplier_timeseries(df_order_lines, previous_rollup, log=log)
+    version = store.publish(
+        {
+            "order_lines": df_order_lines.drop(columns=unpublished_line_columns),
+            "orders": df_orders,
+            "suppliers": suppliers.table,
+            "supplier_months": timeseries.to_rollup(),
+        }
+    )
+    store.write_filter_index(build_filter_index(df_order_lines))
+    return version
+
+
+if __name__ == "__main__":
+    # Ververs de gedeelde dataset; draaiende dashboards pakken de nieuwe versie op bij de volgende rerun
+    import sys
+
+    from dataset_store import DatasetStore
+
+    version = publish_order_lines(DatasetStore(), log=True, full_rebuild="--full" in sys.argv)
+    print(f"Published dataset version {version}")
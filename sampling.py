@@ -0,0 +1,244 @@
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+
+def reservoir_sample(chunks, k: int, seed: int = None):
+    """
+    Draw a uniform random sample of k rows from a stream of DataFrame chunks
+    (Algorithm R, vectorised per chunk).
+
+    Parameters:
+    - chunks: Iterable of DataFrames with the same columns.
+    - k: Number of rows to keep.
+    - seed: Optional random seed.
+
+    Returns:
+    - Tuple (sample DataFrame, number of rows seen).
+    """
+    rng = np.random.default_rng(seed)
+    reservoir = None
+    seen = 0
+    for chunk in chunks:
+        chunk = chunk.reset_index(drop=True)
+        filled = 0 if reservoir is None else len(reservoir)
+        # Eerst de reservoir vullen tot k rijen; de index van de reservoir is het slotnummer
+        start = min(k - filled, len(chunk))
+        head = chunk.iloc[:start].set_axis(np.arange(filled, filled + start))
+        reservoir = head if reservoir is None else pd.concat([reservoir, head])
+
+        remaining = len(chunk) - start
+        if remaining > 0:
+            # Rij i (0-based, globaal) vervangt een willekeurig slot met kans k / (i + 1)
+            positions = np.arange(seen + start, seen + len(chunk))
+            slots = (rng.random(remaining) * (positions + 1)).astype(np.int64)
+            hit = np.flatnonzero(slots < k)
+            # Bij dubbele slots wint de laatste rij, net als bij sequentieel verwerken
+            replacements = pd.Series(hit + start, index=slots[hit])
+            replacements = replacements[~replacements.index.duplicated(keep="last")]
+            incoming = chunk.iloc[replacements.to_numpy()].set_axis(replacements.index)
+            reservoir = pd.concat([reservoir.drop(index=replacements.index), incoming])
+        seen += len(chunk)
+    if reservoir is None:
+        return pd.DataFrame(), 0
+    return reservoir.sort_index().reset_index(drop=True), seen
+
+
+def stratified_keys(strata: pd.Series, seed: int = None) -> np.ndarray:
+    """
+    Return a sort key per row such that the rows with the n smallest keys form a
+    proportionally stratified random sample, for every n.
+
+    Parameters:
+    - strata: Stratum label per row (e.g. order year or supplier name).
+    - seed: Optional random seed.
+    """
+    rng = np.random.default_rng(seed)
+    codes, uniques = pd.factorize(strata, use_na_sentinel=False)
+    codes = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+    # Willekeurige volgorde, daarna stabiel groeperen per stratum (radix sort op kleine integers)
+    perm = rng.permutation(len(codes))
+    grouped = perm[np.argsort(codes[perm], kind="stable")]
+    sizes = np.bincount(codes, minlength=len(uniques))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    ranks = np.empty(len(codes), dtype=np.float64)
+    ranks[grouped] = np.arange(len(codes)) - np.repeat(starts, sizes)
+    return (ranks + rng.random(len(codes))) / sizes[codes]
+
+
+class ApproximateEDA:
+    def __init__(self, df: pd.DataFrame, sample_size: int = 10_000, stratify_by=None,
+                 confidence: float = 0.95, seed: int = None, population_size: int = None):
+        """
+        Approximate summaries on a random or stratified sample, with confidence intervals.
+
+        Parameters:
+        - df: The DataFrame to summarise (or an already drawn sample, see population_size).
+        - sample_size: Number of rows used by default.
+        - stratify_by: Optional column name or Series with strata (e.g. df['Datum'].dt.year or 'Naam').
+        - confidence: Confidence level of the reported intervals.
+        - seed: Optional random seed for reproducible samples.
+        - population_size: Size of the population df was sampled from (default: len(df)).
+        """
+        self.df = df
+        self.population_size = population_size or len(df)
+        self.sample_size = min(sample_size, len(df))
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+
+        if stratify_by is None:
+            self._keys = np.random.default_rng(seed).random(len(df))
+        else:
+            strata = df[stratify_by] if isinstance(stratify_by, str) else pd.Series(stratify_by).reindex(df.index)
+            self._keys = stratified_keys(strata, seed)
+
+    @classmethod
+    def from_chunks(cls, chunks, sample_size: int = 10_000, confidence: float = 0.95, seed: int = None):
+        """
+        Build from a stream of chunks using a reservoir sample, without holding all rows in memory.
+        """
+        sample, seen = reservoir_sample(chunks, sample_size, seed)
+        return cls(sample, sample_size, confidence=confidence, seed=seed, population_size=seen)
+
+    def sample(self, n: int = None) -> pd.DataFrame:
+        n = self.sample_size if n is None else min(n, len(self._keys))
+        if n >= len(self._keys):
+            return self.df
+        # De n kleinste sleutels vormen de steekproef; argpartition is O(rijen), geen volledige sortering
+        return self.df.iloc[np.sort(np.argpartition(self._keys, n - 1)[:n])]
+
+    def _fpc(self, n: int) -> float:
+        # Eindige-populatiecorrectie: de marge wordt 0 als alle rijen gescand zijn
+        big_n = self.population_size
+        return np.sqrt((big_n - n) / (big_n - 1)) if big_n > 1 else 0.0
+
+    def _quantile_interval(self, values: np.ndarray, q: float, fpc: float):
+        # Betrouwbaarheidsinterval van een kwantiel via rangordes (normale benadering van de binomiaal)
+        n = len(values)
+        position = q * (n - 1)
+        spread = self.z * np.sqrt(n * q * (1 - q)) * fpc
+        low = int(np.clip(np.floor(position - spread), 0, n - 1))
+        high = int(np.clip(np.ceil(position + spread), 0, n - 1))
+        return values[low], values[high]
+
+    def numeric_summary(self, n: int = None) -> pd.DataFrame:
+        """
+        Approximate describe() of numeric columns.
+
+        Returns:
+        - DataFrame indexed by (column, statistic) with estimate, ci_low and ci_high.
+        """
+        sample = self.sample(n).select_dtypes(include=[np.number])
+        rows = []
+        for col in sample.columns:
+            values = np.sort(sample[col].dropna().to_numpy(dtype=np.float64))
+            size = len(sample)
+            if len(values) == 0:
+                continue
+            fpc = self._fpc(size)
+            share = len(values) / size
+            share_margin = self.z * np.sqrt(share * (1 - share) / size) * fpc
+            count = share * self.population_size
+            rows.append((col, "count", count, count - share_margin * self.population_size,
+                         count + share_margin * self.population_size))
+
+            mean = values.mean()
+            std = values.std(ddof=1) if len(values) > 1 else 0.0
+            mean_margin = self.z * std / np.sqrt(len(values)) * fpc
+            rows.append((col, "mean", mean, mean - mean_margin, mean + mean_margin))
+            std_margin = self.z * std / np.sqrt(2 * max(len(values) - 1, 1)) * fpc
+            rows.append((col, "std", std, max(std - std_margin, 0.0), std + std_margin))
+
+            # Het echte minimum/maximum ligt altijd op of voorbij de waarde in de steekproef
+            rows.append((col, "min", values[0], np.nan, values[0]))
+            for q, label in ((0.25, "25%"), (0.5, "50%"), (0.75, "75%")):
+                low, high = self._quantile_interval(values, q, fpc)
+                rows.append((col, label, np.quantile(values, q), low, high))
+            rows.append((col, "max", values[-1], values[-1], np.nan))
+
+        result = pd.DataFrame(rows, columns=["column", "statistic", "estimate", "ci_low", "ci_high"])
+        return result.set_index(["column", "statistic"])
+
+    def value_counts(self, column: str, top_n: int = 5, n: int = None) -> pd.DataFrame:
+        """
+        Approximate value_counts() of one column.
+
+        Returns:
+        - DataFrame indexed by value with proportion, ci_low, ci_high and estimated_count.
+        """
+        sample = self.sample(n)[column]
+        size = len(sample)
+        proportions = sample.value_counts(normalize=True).head(top_n)
+        margin = self.z * np.sqrt(proportions * (1 - proportions) / max(size, 1)) * self._fpc(size)
+        return pd.DataFrame({
+            "proportion": proportions,
+            "ci_low": (proportions - margin).clip(lower=0),
+            "ci_high": (proportions + margin).clip(upper=1),
+            "estimated_count": (proportions * self.population_size).round().astype(int),
+        })
+
+    def categorical_summary(self, top_n: int = 5, n: int = None) -> dict:
+        sample = self.sample(n)
+        cat_cols = sample.select_dtypes(include=["object", "category", "string"]).columns
+        return {col: self.value_counts(col, top_n, n) for col in cat_cols}
+
+    def correlation_matrix(self, n: int = None) -> pd.DataFrame:
+        """
+        Approximate Pearson correlations with Fisher-z confidence intervals.
+
+        Returns:
+        - DataFrame indexed by (column_a, column_b) with estimate, ci_low and ci_high.
+        """
+        num_df = self.sample(n).select_dtypes(include=[np.number])
+        corr = num_df.corr()
+        pair_counts = num_df.notna().astype(int).T.dot(num_df.notna().astype(int))
+        rows = []
+        for i, col_a in enumerate(corr.columns):
+            for col_b in corr.columns[i + 1:]:
+                r = corr.loc[col_a, col_b]
+                pairs = pair_counts.loc[col_a, col_b]
+                if np.isnan(r) or pairs <= 3:
+                    rows.append((col_a, col_b, r, np.nan, np.nan))
+                    continue
+                z_r = np.arctanh(np.clip(r, -0.999999, 0.999999))
+                margin = self.z / np.sqrt(pairs - 3) * self._fpc(len(num_df))
+                rows.append((col_a, col_b, r, np.tanh(z_r - margin), np.tanh(z_r + margin)))
+        result = pd.DataFrame(rows, columns=["column_a", "column_b", "estimate", "ci_low", "ci_high"])
+        return result.set_index(["column_a", "column_b"])
+
+    def progressive(self, statistic: str = "numeric_summary", initial: int = 1_000, growth: int = 4,
+                    limit: int = None, **kwargs):
+        """
+        Yield successively tighter estimates while scanning more rows.
+
+        Parameters:
+        - statistic: Name of the method to run ('numeric_summary', 'categorical_summary',
+          'value_counts' or 'correlation_matrix').
+        - initial: Rows in the first answer.
+        - growth: Factor by which the scanned rows grow per step.
+        - limit: Stop after this many rows (default: all rows, which gives exact results).
+        - kwargs: Passed on to the statistic method.
+
+        Yields:
+        - Tuples (rows scanned, result).
+
+        Raises:
+        - ValueError: If growth <= 1 or initial < 1 (the scan would never reach the last row).
+        """
+        if growth <= 1:
+            raise ValueError("growth must be greater than 1")
+        if initial < 1:
+            raise ValueError("initial must be at least 1")
+        # Controle direct bij de aanroep, niet pas bij de eerste next() van de generator
+        return self._progressive(getattr(self, statistic), initial, growth, limit, kwargs)
+
+    def _progressive(self, method, initial: int, growth: float, limit: int, kwargs: dict):
+        total = len(self._keys) if limit is None else min(limit, len(self._keys))
+        n = min(initial, total)
+        while True:
+            yield n, method(n=n, **kwargs)
+            if n >= total:
+                return
+            # Minstens één rij verder, ook bij een groeifactor als 1.1 op kleine n
+            n = min(max(n + 1, int(n * growth)), total)
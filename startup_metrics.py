@@ -0,0 +1,80 @@
+import re
+import subprocess
+import sys
+import time
+
+# Modules waarvan de importtijd de opstarttijd van het dashboard bepaalt
+STARTUP_MODULES = ["ui", "main_dependencies", "plotly.express", "scipy.stats"]
+MAIN_DEPENDENCIES = "import streamlit, dataset_store, pipeline, warmup, ui"
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure_import_time(statement: str, module: str = None, runs: int = 3) -> float:
+    """
+    Measure the cumulative import time of a module in a fresh interpreter (python -X importtime).
+
+    Parameters:
+    - statement: Python statement to run, e.g. "import ui".
+    - module: Top-level module whose cumulative time is reported (default: everything imported).
+    - runs: Number of fresh interpreters; the fastest run is reported.
+
+    Returns:
+    - Import time in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            capture_output=True, text=True, check=True
+        )
+        total_us = 0
+        for line in completed.stderr.splitlines():
+            match = _IMPORTTIME_LINE.match(line)
+            if not match:
+                continue
+            cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+            if module is not None and name == module:
+                total_us = cumulative
+                break
+            if module is None and indent == "":
+                # Alleen top-level imports optellen, anders tellen we geneste modules dubbel
+                total_us += cumulative
+        timings.append(total_us / 1000)
+    return min(timings)
+
+
+def import_report(runs: int = 3) -> dict:
+    """
+    Return import times (ms) of the modules that matter for dashboard startup.
+    """
+    report = {}
+    for module in STARTUP_MODULES:
+        if module == "main_dependencies":
+            report[module] = measure_import_time(MAIN_DEPENDENCIES, runs=runs)
+        else:
+            report[module] = measure_import_time(f"import {module}", module, runs=runs)
+    return report
+
+
+class StartupTimer:
+    def __init__(self):
+        """
+        Record named timestamps relative to the start of a script run (e.g. time to first paint).
+        """
+        self.start = time.perf_counter()
+        self.marks = {}
+
+    def mark(self, label: str) -> float:
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        self.marks[label] = elapsed_ms
+        return elapsed_ms
+
+    def summary(self) -> str:
+        return ", ".join(f"{label}: {elapsed:.0f} ms" for label, elapsed in self.marks.items())
+
+
+if __name__ == "__main__":
+    print("Import times (fastest of 3 fresh interpreters):")
+    for module, elapsed in import_report().items():
+        print(f"- {module}: {elapsed:.0f} ms")
@@ -0,0 +1,261 @@
+import numpy as np
+import pandas as pd
+
+# Optelbare maandmaten per leverancier; afgeleide KPI's (gemiddelde vertraging, fill rate) worden hieruit berekend
+MEASURES = [
+    'deliveries',       # som van DeliveryCount
+    'lines',            # aantal orderregels
+    'late_lines',       # regels met DeliveryDelay > 0
+    'delay_sum',        # som van DeliveryDelay (dagen)
+    'delay_count',      # regels met een bekende DeliveryDelay
+    'ordered',          # som van QuUn
+    'received',         # som van TotalReceived, per regel afgekapt op QuUn
+    'fully_delivered',  # regels met FullyDelivered
+]
+
+# KPI -> (teller, noemer); zonder noemer is het een (rollende) som
+KPIS = {
+    'deliveries': ('deliveries', None),
+    'lines': ('lines', None),
+    'late_lines': ('late_lines', None),
+    'late_rate': ('late_lines', 'delay_count'),
+    'mean_delay': ('delay_sum', 'delay_count'),
+    'fill_rate': ('received', 'ordered'),
+    'fully_delivered_rate': ('fully_delivered', 'lines'),
+}
+
+
+def month_number(dates: pd.Series) -> np.ndarray:
+    """
+    Convert dates to integer months (year * 12 + month - 1).
+    """
+    return (dates.dt.year * 12 + dates.dt.month - 1).to_numpy()
+
+
+def month_label(months) -> list:
+    """
+    Convert integer months back to 'YYYY-MM' labels.
+    """
+    return [f"{month // 12:04d}-{month % 12 + 1:02d}" for month in np.asarray(months, dtype=np.int64)]
+
+
+class SupplierTimeSeries:
+    def __init__(self):
+        """
+        Monthly measures per supplier in dense (supplier x month) arrays, with running
+        sums along the month axis so rolling windows are maintained incrementally.
+        """
+        self.suppliers = pd.Index([], dtype=object)
+        self.first_month = None
+        self.values = {measure: np.zeros((0, 0)) for measure in MEASURES}
+        self._cumsum = {measure: np.zeros((0, 1)) for measure in MEASURES}
+
+    @property
+    def n_months(self) -> int:
+        return self.values['lines'].shape[1]
+
+    @property
+    def months(self) -> np.ndarray:
+        if self.first_month is None:
+            return np.array([], dtype=np.int64)
+        return np.arange(self.first_month, self.first_month + self.n_months)
+
+    @classmethod
+    def from_order_lines(cls, df: pd.DataFrame):
+        store = cls()
+        store.append(df)
+        return store
+
+    @classmethod
+    def from_rollup(cls, rollup: pd.DataFrame):
+        """
+        Rebuild the store from the long table written by to_rollup().
+        """
+        store = cls()
+        store._add(rollup['Naam'], rollup['Month'].to_numpy(dtype=np.int64),
+                   {measure: rollup[measure].to_numpy(dtype=np.float64) for measure in MEASURES})
+        return store
+
+    def to_rollup(self) -> pd.DataFrame:
+        """
+        Return the non-empty (supplier, month) cells as a long table, e.g. to publish with the dataset.
+        """
+        rows, cols = np.nonzero(self.values['lines'])
+        rollup = pd.DataFrame({'Naam': self.suppliers[rows].astype(str), 'Month': self.months[cols]})
+        for measure in MEASURES:
+            rollup[measure] = self.values[measure][rows, cols]
+        return rollup
+
+    def append(self, df: pd.DataFrame):
+        """
+        Add order lines (e.g. a newly loaded month) to the store.
+
+        Parameters:
+        - df: Order lines with Naam, Datum, DeliveryCount, DeliveryDelay, QuUn, TotalReceived and FullyDelivered.
+        """
+        df = df[df['Naam'].notna() & df['Datum'].notna()]
+        delay = df['DeliveryDelay'].to_numpy(dtype=np.float64, na_value=np.nan)
+        known = ~np.isnan(delay)
+        ordered = df['QuUn'].to_numpy(dtype=np.float64, na_value=0.0)
+        received = np.minimum(df['TotalReceived'].to_numpy(dtype=np.float64, na_value=0.0), ordered)
+        self._add(df['Naam'], month_number(df['Datum']), {
+            'deliveries': df['DeliveryCount'].to_numpy(dtype=np.float64),
+            'lines': np.ones(len(df)),
+            'late_lines': (known & (delay > 0)).astype(np.float64),
+            'delay_sum': np.where(known, delay, 0.0),
+            'delay_count': known.astype(np.float64),
+            'ordered': ordered,
+            'received': received,
+            'fully_delivered': df['FullyDelivered'].to_numpy(dtype=np.float64, na_value=0.0),
+        })
+
+    def truncate(self, month: int):
+        """
+        Drop every month from `month` on, e.g. to recompute recent months that can still change.
+        """
+        if self.first_month is None:
+            return
+        keep = min(max(month - self.first_month, 0), self.n_months)
+        for measure in MEASURES:
+            self.values[measure] = self.values[measure][:, :keep]
+            self._cumsum[measure] = self._cumsum[measure][:, :keep + 1]
+        if keep == 0:
+            self.first_month = None
+
+    def _add(self, names: pd.Series, months: np.ndarray, weights: dict):
+        if len(months) == 0:
+            return
+        codes, uniques = pd.factorize(names.astype(object))
+        new_names = pd.Index(uniques).difference(self.suppliers, sort=False)
+        old_first = self.first_month
+        first = int(months.min()) if old_first is None else min(old_first, int(months.min()))
+        last = int(months.max()) if old_first is None else max(old_first + self.n_months - 1, int(months.max()))
+
+        # Assen uitbreiden voor nieuwe leveranciers en maanden (links alleen als er oudere maanden bijkomen)
+        pad_left = 0 if old_first is None else old_first - first
+        n_suppliers = len(self.suppliers) + len(new_names)
+        n_months = last - first + 1
+        for measure in MEASURES:
+            grown = np.zeros((n_suppliers, n_months))
+            old = self.values[measure]
+            grown[:old.shape[0], pad_left:pad_left + old.shape[1]] = old
+            self.values[measure] = grown
+        self.suppliers = self.suppliers.append(new_names)
+        self.first_month = first
+
+        rows = self.suppliers.get_indexer(uniques)[codes]
+        flat = rows * n_months + (months - first)
+        for measure in MEASURES:
+            self.values[measure] += np.bincount(flat, weights=weights[measure],
+                                                minlength=n_suppliers * n_months).reshape(n_suppliers, n_months)
+
+        # Lopende sommen alleen bijwerken vanaf de eerste maand die veranderd is
+        changed_from = 0 if pad_left or old_first is None else int(months.min()) - first
+        self._update_cumsum(changed_from)
+
+    def _update_cumsum(self, changed_from: int):
+        for measure in MEASURES:
+            values = self.values[measure]
+            cumsum = self._cumsum[measure]
+            if cumsum.shape != (values.shape[0], values.shape[1] + 1):
+                # Nieuwe leveranciers of maanden: vanaf het begin (of het eerste gewijzigde punt) opnieuw
+                grown = np.zeros((values.shape[0], values.shape[1] + 1))
+                keep = min(changed_from + 1, cumsum.shape[1])
+                grown[:cumsum.shape[0], :keep] = cumsum[:, :keep]
+                cumsum = grown
+            cumsum[:, changed_from + 1:] = cumsum[:, [changed_from]] + np.cumsum(values[:, changed_from:], axis=1)
+            self._cumsum[measure] = cumsum
+
+    def rolling_sum(self, measure: str, window: int = 1) -> np.ndarray:
+        """
+        Sum of a measure over the last `window` months, for every (supplier, month).
+        """
+        cumsum = self._cumsum[measure]
+        end = np.arange(1, self.n_months + 1)
+        start = np.maximum(end - window, 0)
+        return cumsum[:, end] - cumsum[:, start]
+
+    def kpi(self, name: str, window: int = 1) -> np.ndarray:
+        """
+        Monthly (window=1) or rolling KPI per (supplier, month); ratios are NaN where undefined.
+
+        Parameters:
+        - name: One of KPIS, e.g. 'deliveries', 'late_rate', 'mean_delay' or 'fill_rate'.
+        - window: Rolling window in months.
+        """
+        numerator, denominator = KPIS[name]
+        values = self.rolling_sum(numerator, window)
+        if denominator is None:
+            return values
+        totals = self.rolling_sum(denominator, window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(totals > 0, values / totals, np.nan)
+
+    def _month_mask(self, years: list = None) -> np.ndarray:
+        if not years:
+            return np.ones(self.n_months, dtype=bool)
+        return np.isin(self.months // 12, years)
+
+    def _supplier_rows(self, suppliers: list = None) -> np.ndarray:
+        if suppliers is None:
+            return np.arange(len(self.suppliers))
+        rows = self.suppliers.get_indexer(list(suppliers))
+        return rows[rows >= 0]
+
+    def totals(self, measure: str, years: list = None, suppliers: list = None) -> pd.Series:
+        """
+        Total of a measure per supplier over the selected years (suppliers without lines are left out).
+        """
+        rows = self._supplier_rows(suppliers)
+        months = self._month_mask(years)
+        active = self.values['lines'][np.ix_(rows, months)].sum(axis=1) > 0
+        values = self.values[measure][np.ix_(rows, months)].sum(axis=1)
+        return pd.Series(values[active], index=self.suppliers[rows[active]])
+
+    def trend(self, name: str, window: int = 6, years: list = None, suppliers: list = None) -> pd.Series:
+        """
+        Least-squares slope of a monthly KPI over the last `window` selected months, per supplier.
+        """
+        rows = self._supplier_rows(suppliers)
+        months = np.flatnonzero(self._month_mask(years))[-window:]
+        y = self.kpi(name)[np.ix_(rows, months)]
+        y = np.where(self.values['lines'][np.ix_(rows, months)] > 0, y, np.nan)
+        x = np.broadcast_to(np.arange(len(months), dtype=np.float64), y.shape)
+        valid = ~np.isnan(y)
+        counts = valid.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_mean = np.where(valid, x, 0).sum(axis=1) / counts
+            y_mean = np.where(valid, y, 0).sum(axis=1) / counts
+            dx = np.where(valid, x - x_mean[:, None], 0)
+            dy = np.where(valid, y - y_mean[:, None], 0)
+            slope = (dx * dy).sum(axis=1) / (dx * dx).sum(axis=1)
+        return pd.Series(np.where(counts >= 2, slope, np.nan), index=self.suppliers[rows])
+
+    def latest(self, name: str, window: int = 3, years: list = None, suppliers: list = None) -> pd.Series:
+        """
+        Rolling KPI at the last selected month, per supplier.
+        """
+        rows = self._supplier_rows(suppliers)
+        months = np.flatnonzero(self._month_mask(years))
+        if len(months) == 0:
+            return pd.Series(np.nan, index=self.suppliers[rows])
+        return pd.Series(self.kpi(name, window)[rows, months[-1]], index=self.suppliers[rows])
+
+    def frame(self, name: str, window: int = 1, years: list = None, suppliers: list = None) -> pd.DataFrame:
+        """
+        Long table (YearMonth, Naam, value) of a KPI for charting; only months in which a supplier has lines.
+        """
+        rows = self._supplier_rows(suppliers)
+        months = np.flatnonzero(self._month_mask(years))
+        values = self.kpi(name, window)[np.ix_(rows, months)]
+        if KPIS[name][1] is None:
+            values = np.rint(values).astype(np.int64)
+        row_idx, month_idx = np.nonzero(self.values['lines'][np.ix_(rows, months)] > 0)
+        # Sorteren op maand en daarna leverancier, zoals een groupby op (YearMonth, Naam)
+        order = np.lexsort((self.suppliers[rows].astype(str)[row_idx], month_idx))
+        row_idx, month_idx = row_idx[order], month_idx[order]
+        return pd.DataFrame({
+            'YearMonth': month_label(self.months[months][month_idx]),
+            'Naam': self.suppliers[rows][row_idx].astype(str),
+            name: values[row_idx, month_idx],
+        })
@@ -1,37 +1,156 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from scipy.stats import chi2_contingency
+import numpy as np
+
+from dimensions import SupplierDimension
+from pipeline import build_filter_index, build_order_facts
+from timeseries_store import SupplierTimeSeries
+
+# Plotly Express en scipy.stats worden pas geïmporteerd als een grafiek ze nodig heeft (snellere start)
 
 st.set_page_config(layout="wide")
 
+# Keuzes in de trendgrafiek: KPI uit de leveranciers-tijdreeks -> label
+TIMESERIES_KPIS = {
+    'deliveries': 'Deliveries',
+    'lines': 'Order lines',
+    'late_lines': 'Late lines',
+    'late_rate': 'Late rate',
+    'mean_delay': 'Mean delay (days)',
+    'fill_rate': 'Fill rate',
+}
+
+DELIVERY_CATEGORIES = ['Early', 'On Time', 'Late']
+
 class UI:
-    def __init__(self, df):
-        self.original_df = df.copy()
+    def __init__(self, df=None, filter_index: dict = None, orders=None, timeseries: SupplierTimeSeries = None,
+                 suppliers: SupplierDimension = None):
+        # De filters renderen uit de lichte filter-index; de data kan later met attach_data() worden gekoppeld
+        # (df is None zolang de dataset nog opwarmt of nog niet gekoppeld is).
+        self.original_df = None
+        self.orders = None
+        self.timeseries = None
+        self.suppliers = None
         self.selected_years = []
         self.selected_suppliers = []
-        self.filtered_df = df.copy()
+        self.filtered_df = None
+        self.filtered_orders = None
+        self.order_mask = None
+        self._line_years = None
         self.top_percent = 10
+        if filter_index is None:
+            filter_index = build_filter_index(df) if df is not None else {'years': [], 'suppliers': {}}
+        self.filter_index = filter_index
+        if df is not None:
+            self.attach_data(df, orders, timeseries, suppliers)
+
+    def attach_data(self, df, orders=None, timeseries: SupplierTimeSeries = None, suppliers: SupplierDimension = None):
+        # Geen kopieën: df is de gedeelde, read-only dataset; filters maken nieuwe frames.
+        # orders is de order-feitentabel; regels verwijzen ernaar via OrderKey.
+        # suppliers is de leveranciersdimensie; groeperen en filteren gaat via de integer SupplierKey.
+        # Al gekozen filters worden direct toegepast.
+        if suppliers is None:
+            suppliers = SupplierDimension.build(df['Naam'])
+        if 'SupplierKey' not in df.columns:
+            df = df.assign(SupplierKey=suppliers.keys(df['Naam']))
+        if orders is None:
+            orders = build_order_facts(df)
+            df = df.assign(OrderKey=pd.Index(orders['OrNu']).get_indexer(df['OrNu']))
+        if 'SupplierKey' not in orders.columns:
+            orders = orders.assign(SupplierKey=suppliers.keys(orders['Naam']))
+        if timeseries is None:
+            timeseries = SupplierTimeSeries.from_order_lines(df)
+        self.original_df = df
+        self.orders = orders
+        self.timeseries = timeseries
+        self.suppliers = suppliers
+        self._line_years = df['Datum'].dt.year.to_numpy()
+        self._apply_filters()
+
+    def _apply_filters(self):
+        if not self.selected_years and not self.selected_suppliers:
+            self.order_mask = np.ones(len(self.orders), dtype=bool)
+            self.filtered_orders = self.orders
+            self.filtered_df = self.original_df
+            return
+        # Eén definitie overal (filter-index, tijdreeks en filters): het jaar en de leverancier van de regel zelf
+        line_mask = np.ones(len(self.original_df), dtype=bool)
+        if self.selected_years:
+            line_mask &= np.isin(self._line_years, self.selected_years)
+        if self.selected_suppliers:
+            keys = self.suppliers.keys(pd.Series(self.selected_suppliers, dtype=object))
+            line_mask &= np.isin(self.original_df['SupplierKey'].to_numpy(), keys[keys >= 0])
+        self._filter_orders(line_mask)
+
+    def _filter_orders(self, line_mask):
+        # Een order telt mee als een van zijn regels aan de filters voldoet; de regels volgen via de gedeelde
+        # OrderKey (geen hergroepering). Regels zonder order (OrderKey -1) gebruiken hun eigen filtermasker.
+        order_key = self.original_df['OrderKey'].to_numpy()
+        has_order = order_key >= 0
+        self.order_mask = np.bincount(order_key[line_mask & has_order], minlength=len(self.orders)) > 0
+        self.filtered_orders = self.orders[self.order_mask]
+        if len(self.orders):
+            line_mask = np.where(has_order, self.order_mask[np.maximum(order_key, 0)], line_mask)
+        self.filtered_df = self.original_df[line_mask]
+
+    def _supplier_totals(self, df, column: str = None) -> pd.Series:
+        # Aantal regels (of som van een kolom) per leverancier via bincount op SupplierKey;
+        # leveranciers zonder regels vallen weg, namen alleen voor de weergave
+        keys = df['SupplierKey'].to_numpy()
+        known = keys >= 0
+        present = np.bincount(keys[known], minlength=len(self.suppliers)) > 0
+        if column is None:
+            totals = np.bincount(keys[known], minlength=len(self.suppliers))
+        else:
+            values = df[column].to_numpy()
+            totals = np.bincount(keys[known], weights=values[known], minlength=len(self.suppliers))
+            if values.dtype.kind in 'iub':
+                totals = np.rint(totals).astype(np.int64)
+        supplier_keys = np.flatnonzero(present)
+        return pd.Series(totals[supplier_keys], index=pd.Index(supplier_keys, name='SupplierKey'))
+
+    def _category_pivot(self, df) -> pd.DataFrame:
+        # Early / On Time / Late per leverancier (index: SupplierKey) in één bincount over de sleutels
+        keys = df['SupplierKey'].to_numpy()
+        codes = pd.Categorical(df['Category'], categories=DELIVERY_CATEGORIES).codes
+        known = (keys >= 0) & (codes >= 0)
+        n_categories = len(DELIVERY_CATEGORIES)
+        counts = np.bincount(keys[known] * n_categories + codes[known],
+                             minlength=len(self.suppliers) * n_categories).reshape(-1, n_categories)
+        supplier_keys = np.flatnonzero(counts.sum(axis=1) > 0)
+        return pd.DataFrame(counts[supplier_keys], columns=DELIVERY_CATEGORIES,
+                            index=pd.Index(supplier_keys, name='SupplierKey'))
+
+    @staticmethod
+    def _with_delivery_delay(df) -> pd.DataFrame:
+        # De pipeline publiceert DeliveryDelay al (waar beide datums bekend zijn); alleen zonder die kolom berekenen
+        if 'DeliveryDelay' in df.columns:
+            return df
+        return df.assign(DeliveryDelay=(df['DeliveryDate'] - df['ExpectedDeliveryDate']).dt.days)
+
+    def _with_names(self, frame: pd.DataFrame) -> pd.DataFrame:
+        # SupplierKey-index vervangen door de leveranciersnaam (alleen voor de weergave)
+        return frame.set_axis(pd.Index(self.suppliers.names(frame.index), name='Naam'), axis=0).reset_index()
 
     def year_selection(self):
-        all_years = sorted(self.original_df['Datum'].dt.year.unique())
+        all_years = self.filter_index['years']
         self.selected_years = st.multiselect(
             'Select one or more years (leave empty to include all):',
             options=all_years,
             default=[]
         )
 
-        if self.selected_years:
-            self.filtered_df = self.original_df[self.original_df['Datum'].dt.year.isin(self.selected_years)]
-        else:
-            self.filtered_df = self.original_df.copy()
+        if self.original_df is not None:
+            self._apply_filters()
 
     def supplier_selection(self):
-        if self.filtered_df.empty:
+        years = self.selected_years or self.filter_index['years']
+        suppliers = sorted({name for year in years for name in self.filter_index['suppliers'].get(str(year), [])})
+        no_data = self.filtered_df.empty if self.filtered_df is not None else bool(self.selected_years and not suppliers)
+        if no_data:
             st.warning("No data available.")
             return
 
-        suppliers = sorted(self.filtered_df['Naam'].dropna().unique())
         self.selected_suppliers = st.multiselect('Select suppliers:', suppliers)
 
         use_percentage = len(self.selected_suppliers) == 0
@@ -48,11 +167,14 @@ class UI:
                 )
             st.caption(f"No supplier selected. Filter shows top {self.top_percent}% suppliers sorted by relevance.")
         else:
-            self.filtered_df = self.filtered_df[self.filtered_df['Naam'].isin(self.selected_suppliers)]
+            if self.original_df is not None:
+                self._apply_filters()
             self.top_percent = None
             st.caption(f"{len(self.selected_suppliers)} supplier(s) selected. Top-% filter is deactivated.")
 
     def show_date_analysis(self):
+        if self.filtered_df is None:
+            return
         if self.filtered_df.empty:
             st.warning("No data available after filtering.")
             return
@@ -60,9 +182,9 @@ class UI:
         year_label = ", ".join(map(str, self.selected_years)) if self.selected_years else "all years"
         st.subheader(f"Delivery Analysis for {year_label}")
 
-        total_orders = self.filtered_df['OrNu'].nunique() if 'OrNu' in self.filtered_df.columns else 0
+        total_orders = len(self.filtered_orders)
         total_order_lines = len(self.filtered_df)
-        total_suppliers = self.filtered_df['Naam'].nunique()
+        total_suppliers = len(self._supplier_totals(self.filtered_df))
         fully_delivered = self.filtered_df[self.filtered_df['FullyDelivered'] == True].shape[0]
 
         col1, col2, col3, col4 = st.columns(4)
@@ -91,28 +213,13 @@ class UI:
             self.plot_orderline_delivery_by_responsible()
 
     def plot_order_delivery_summary(self):
+        import plotly.express as px
+
         st.info("Shows how many full orders were delivered early, on time, or late per supplier. An order consists of multiple lines.")
         st.caption("More on-time and early deliveries is better.")
 
-        df = self.filtered_df.copy()
-        if 'OrNu' not in df.columns:
-            st.warning("Order number (OrNu) not found in data.")
-            return
-
-        grouped = df.groupby('OrNu').agg({
-            'ExpectedDeliveryDate': 'max',
-            'DeliveryDate': 'max',
-            'FullyDelivered': 'all',
-            'Naam': 'first'
-        }).reset_index()
-
-        grouped['DeliveryDelay'] = (grouped['DeliveryDate'] - grouped['ExpectedDeliveryDate']).dt.days
-        grouped['Category'] = grouped['DeliveryDelay'].apply(
-            lambda x: 'Early' if x < 0 else 'On Time' if x == 0 else 'Late'
-        )
-
-        summary = grouped.groupby(['Naam', 'Category']).size().reset_index(name='Count')
-        pivot_df = summary.pivot(index='Naam', columns='Category', values='Count').fillna(0)
+        # Leest direct uit de order-feitentabel: geen groupby over de regels per render
+        pivot_df = self._category_pivot(self.filtered_orders)
         if not pivot_df.empty:
             pivot_df['Total'] = pivot_df.sum(axis=1)
             pivot_df = pivot_df.sort_values(by='Total', ascending=False)
@@ -121,7 +228,10 @@ class UI:
                 pivot_df = pivot_df.head(top_x)
             pivot_df = pivot_df.drop(columns='Total')
 
-        pivot_df = pivot_df.reset_index()
+        # Feedback uit de leveranciersdimensie: een lookup per getoonde leverancier, geen join per render
+        pivot_df['Feedback score'] = self.suppliers.attribute('FeedbackScore', pivot_df.index)
+        pivot_df['Feedback count'] = self.suppliers.attribute('FeedbackCount', pivot_df.index)
+        pivot_df = self._with_names(pivot_df)
 
         fig = px.bar(
             pivot_df,
@@ -129,29 +239,31 @@ class UI:
             y=['Early', 'On Time', 'Late'],
             title="Order-level Delivery Timeliness per Supplier",
             labels={'value': 'Number of Orders', 'variable': 'Category'},
-            hover_name='Naam'
+            hover_name='Naam',
+            hover_data={'Feedback score': ':.2f', 'Feedback count': True}
         )
         fig.update_layout(barmode='stack', xaxis_tickangle=-45)
         st.plotly_chart(fig, use_container_width=True)
 
     def plot_orderline_delivery_summary(self):
+        import plotly.express as px
+
         st.info("Shows how many order lines were delivered early, on time, or late per supplier.")
         st.caption("More on-time and early deliveries is better.")
 
-        df = self.filtered_df.copy()
-        df = df.dropna(subset=['ExpectedDeliveryDate', 'DeliveryDate'])
+        # Geen .copy(): dropna geeft al een nieuw frame en nieuwe kolommen raken de gedeelde (gemapte) data niet
+        df = self.filtered_df.dropna(subset=['ExpectedDeliveryDate', 'DeliveryDate'])
 
         if df.empty:
             st.warning("No usable data for analysis.")
             return
 
-        df['DeliveryDelay'] = (df['DeliveryDate'] - df['ExpectedDeliveryDate']).dt.days
+        df = self._with_delivery_delay(df)
         df['Category'] = df['DeliveryDelay'].apply(
             lambda x: 'Early' if x < 0 else 'On Time' if x == 0 else 'Late'
         )
 
-        summary = df.groupby(['Naam', 'Category']).size().reset_index(name='Count')
-        pivot_df = summary.pivot(index='Naam', columns='Category', values='Count').fillna(0)
+        pivot_df = self._category_pivot(df)
 
         if not pivot_df.empty:
             pivot_df['Total'] = pivot_df.sum(axis=1)
@@ -161,7 +273,7 @@ class UI:
                 pivot_df = pivot_df.head(top_x)
             pivot_df = pivot_df.drop(columns='Total')
 
-        pivot_df = pivot_df.reset_index()
+        pivot_df = self._with_names(pivot_df)
 
         fig = px.bar(
             pivot_df,
@@ -175,10 +287,12 @@ class UI:
         st.plotly_chart(fig, use_container_width=True)
 
     def plot_delivery_counts(self):
+        import plotly.express as px
+
         st.info("Shows the total number of delivery moments per supplier, measured at the line level.")
         st.caption("More deliveries is better.")
 
-        grouped = self.filtered_df.groupby('Naam')['DeliveryCount'].sum().reset_index()
+        grouped = self._with_names(self._supplier_totals(self.filtered_df, 'DeliveryCount').to_frame('DeliveryCount'))
         if grouped.empty:
             st.info("No deliveries registered.")
             return
@@ -196,6 +310,8 @@ class UI:
         st.plotly_chart(fig, use_container_width=True)
 
     def plot_missing_delivery_date(self):
+        import plotly.express as px
+
         st.info("Indicates how many order lines per supplier do not have a delivery date yet.")
         st.caption("Lower is better.")
 
@@ -204,7 +320,7 @@ class UI:
             st.info("All order lines are delivered.")
             return
 
-        counts = df['Naam'].value_counts().reset_index()
+        counts = self._with_names(self._supplier_totals(df).to_frame('Count'))
         counts.columns = ['Supplier', 'Count']
         counts = counts.sort_values(by='Count', ascending=False)
         if self.top_percent is not None:
@@ -220,6 +336,8 @@ class UI:
         st.plotly_chart(fig, use_container_width=True)
 
     def plot_fully_delivered(self):
+        import plotly.express as px
+
         st.info("Shows per supplier the number of order lines that were fully delivered.")
         st.caption("More is better.")
 
@@ -228,7 +346,7 @@ class UI:
             st.info("No fully delivered order lines found.")
             return
 
-        counts = delivered['Naam'].value_counts().reset_index()
+        counts = self._with_names(self._supplier_totals(delivered).to_frame('Count'))
         counts.columns = ['Supplier', 'Count']
         counts = counts.sort_values(by='Count', ascending=False)
         if self.top_percent is not None:
@@ -243,49 +361,76 @@ class UI:
         st.plotly_chart(fig, use_container_width=True)
 
     def plot_performance_over_time(self):
+        import plotly.express as px
+
         st.info("Visualizes the monthly frequency of deliveries per supplier.")
         st.caption("More deliveries per month is better.")
 
-        df = self.filtered_df.copy()
-        df['YearMonth'] = df['Datum'].dt.to_period('M').astype(str)
-        timeseries = df.groupby(['YearMonth', 'Naam'])['DeliveryCount'].sum().reset_index()
-        if timeseries.empty:
+        col1, col2 = st.columns(2)
+        kpi = col1.selectbox('Measure:', options=list(TIMESERIES_KPIS), format_func=TIMESERIES_KPIS.get)
+        window = col2.select_slider('Rolling window (months):', options=[1, 3, 6, 12], value=1)
+
+        # Leest uit de vooraf opgerolde tijdreeks per leverancier en maand, niet uit de regels
+        suppliers = self.selected_suppliers or None
+        supplier_totals = self.timeseries.totals('deliveries', self.selected_years, suppliers).sort_index()
+        if supplier_totals.empty:
             st.info("No time-based delivery data available.")
             return
 
-        supplier_totals = timeseries.groupby('Naam')['DeliveryCount'].sum()
         if self.top_percent is not None:
             top_x = max(1, int(len(supplier_totals) * self.top_percent / 100))
             top_suppliers = supplier_totals.sort_values(ascending=False).head(top_x).index
-            filtered_timeseries = timeseries[timeseries['Naam'].isin(top_suppliers)]
         else:
-            filtered_timeseries = timeseries
+            top_suppliers = supplier_totals.index
+
+        filtered_timeseries = self.timeseries.frame(kpi, window, self.selected_years, list(top_suppliers))
+        title = "Monthly Delivery Frequency" if kpi == 'deliveries' else f"Monthly {TIMESERIES_KPIS[kpi]}"
+        if window > 1:
+            title += f" (rolling {window} months)"
 
-        fig = px.line(filtered_timeseries, x='YearMonth', y='DeliveryCount', color='Naam',
-                      title="Monthly Delivery Frequency",
-                      hover_data=['Naam', 'DeliveryCount'],
+        fig = px.line(filtered_timeseries, x='YearMonth', y=kpi, color='Naam',
+                      title=title,
+                      hover_data=['Naam', kpi],
+                      labels={kpi: TIMESERIES_KPIS[kpi]},
                       markers=True)
         fig.update_layout(xaxis_tickangle=-45)
         st.plotly_chart(fig, use_container_width=True)
 
+        kpi_window = max(window, 3)
+        st.markdown(f"#### Rolling KPIs (last {kpi_window} months of the selection)")
+        kpis = pd.DataFrame({
+            'Lines': self.timeseries.latest('lines', kpi_window, self.selected_years, list(top_suppliers)),
+            'Late rate': self.timeseries.latest('late_rate', kpi_window, self.selected_years, list(top_suppliers)),
+            'Mean delay (days)': self.timeseries.latest('mean_delay', kpi_window, self.selected_years, list(top_suppliers)),
+            'Fill rate': self.timeseries.latest('fill_rate', kpi_window, self.selected_years, list(top_suppliers)),
+            'Late rate trend / month': self.timeseries.trend('late_rate', 6, self.selected_years, list(top_suppliers)),
+        })
+        supplier_keys = self.suppliers.keys(pd.Series(kpis.index, dtype=object))
+        kpis['Feedback score'] = np.where(
+            supplier_keys >= 0, self.suppliers.attribute('FeedbackScore', np.maximum(supplier_keys, 0)), np.nan
+        )
+        st.dataframe(kpis.round(3), use_container_width=True)
+
     def plot_orderline_delivery_by_responsible(self):
+        import plotly.express as px
+        from scipy.stats import chi2_contingency
+
         st.info("Shows how many order lines were delivered early, on time, or late per responsible person.")
         st.caption("Analysis is based on order line level. Only top 5 responsible persons are included in chi-square test.")
 
-        df = self.filtered_df.copy()
-        df = df.dropna(subset=['ExpectedDeliveryDate', 'DeliveryDate', 'Verantwoordelijke'])
+        df = self.filtered_df.dropna(subset=['ExpectedDeliveryDate', 'DeliveryDate', 'Verantwoordelijke'])
 
         if df.empty:
             st.info("No usable data for analysis.")
             return
 
-        df['DeliveryDelay'] = (df['DeliveryDate'] - df['ExpectedDeliveryDate']).dt.days
+        df = self._with_delivery_delay(df)
         df['Category'] = df['DeliveryDelay'].apply(
             lambda x: 'Early' if x < 0 else 'On Time' if x == 0 else 'Late'
         )
 
         top5 = df['Verantwoordelijke'].value_counts().nlargest(5).index
-        df['VerantwoordelijkeTop5'] = df['Verantwoordelijke'].apply(lambda x: x if x in top5 else 'Other')
+        df['VerantwoordelijkeTop5'] = df['Verantwoordelijke'].astype(object).apply(lambda x: x if x in top5 else 'Other')
         df_top5 = df[df['VerantwoordelijkeTop5'] != 'Other']
 
         if df_top5.empty:
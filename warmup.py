@@ -0,0 +1,69 @@
+import threading
+import time
+import traceback
+
+
+class BackgroundWarmUp:
+    def __init__(self, task, name: str = "warm-up"):
+        """
+        Run a slow task (load, clean and publish the dataset) on a background thread,
+        so the dashboard can render while it runs.
+
+        Parameters:
+        - task: Callable task(progress) that reports through progress(fraction, message).
+        - name: Thread name, shown in logs.
+        """
+        self.task = task
+        self.name = name
+        self.fraction = 0.0
+        self.message = "Waiting to start"
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self.started_at = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        return self
+
+    def _progress(self, fraction: float, message: str):
+        with self._lock:
+            self.fraction = max(0.0, min(fraction, 1.0))
+            self.message = message
+
+    def _run(self):
+        try:
+            result = self.task(self._progress)
+            with self._lock:
+                self.result = result
+                self.fraction = 1.0
+                self.message = "Done"
+        except Exception as e:
+            with self._lock:
+                self.error = e
+                self.message = "".join(traceback.format_exception_only(type(e), e)).strip()
+        finally:
+            self.finished_at = time.perf_counter()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def status(self):
+        """
+        Return a consistent snapshot (fraction, message, done, error).
+        """
+        with self._lock:
+            return self.fraction, self.message, self.done, self.error